@@ -0,0 +1,96 @@
+import json
+try:
+    import utime
+except ImportError:
+    import time as utime
+from event_store import find_start
+from day_index import date_key
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+_JSON = 'application/json'
+
+
+def _int_param(params, name, default=None, minimum=None, maximum=None):
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    value = int(value)
+    if minimum is not None and value < minimum:
+        value = minimum
+    if maximum is not None and value > maximum:
+        value = maximum
+    return value
+
+
+def _bad_request(e):
+    return '400 Bad Request', _JSON, (json.dumps({'error': str(e)}),), ()
+
+
+def _event_json(event):
+    return json.dumps({'type': event['type'], 'start': event['start'], 'end': event['end']})
+
+
+def _event_page(events, lo, hi, limit):
+    yield '{"events":['
+    end = min(hi, lo + limit)
+    for i in range(lo, end):
+        yield _event_json(events[i]) if i == lo else ',' + _event_json(events[i])
+    # 游标是下一页第一条事件的开始时间，日志压缩后依然有效
+    next_cursor = events[end]['start'] if end < hi else None
+    yield '],"next":' + json.dumps(next_cursor) + '}'
+
+
+def events(request, events):
+    # /api/events?from=&to=&cursor=&limit=  按开始时间 [from, to) 过滤
+    try:
+        start = _int_param(request.query, 'from', 0)
+        stop = _int_param(request.query, 'to')
+        cursor = _int_param(request.query, 'cursor')
+        limit = _int_param(request.query, 'limit', DEFAULT_LIMIT, 1, MAX_LIMIT)
+    except ValueError as e:
+        return _bad_request(e)
+    lo = find_start(events, start if cursor is None or cursor < start else cursor)
+    hi = len(events) if stop is None else find_start(events, stop, lo)
+    return '200 OK', _JSON, _event_page(events, lo, hi, limit), ()
+
+
+def _summary_rows(index, keys, archived):
+    yield '{"days":['
+    first = True
+    for key, sitting, standing in archived:
+        yield ('' if first else ',') + json.dumps({'date': key, 'sitting': sitting, 'standing': standing})
+        first = False
+    for key in keys:
+        sitting, standing = index.totals(key)
+        yield ('' if first else ',') + json.dumps({'date': key, 'sitting': sitting, 'standing': standing})
+        first = False
+    yield ']}'
+
+
+def summary(request, index, archive=None):
+    # /api/summary?days=N  最近 N 天的汇总: 索引里的近期日期，不够时从归档文件尾部补
+    try:
+        days = _int_param(request.query, 'days', 7, 1)
+    except ValueError as e:
+        return _bad_request(e)
+    last = archive.last if archive is not None else None
+    keys = [key for key in sorted(index.days) if last is None or key > last][-days:]
+    archived = archive.tail(days - len(keys)) if archive is not None and len(keys) < days else ()
+    return '200 OK', _JSON, _summary_rows(index, keys, archived), ()
+
+
+def status(request, events, index, sitting, ticker=None):
+    now = utime.time()
+    total_sitting, total_standing = index.totals(date_key(now))
+    last = events[-1] if events else None
+    body = {
+        'time': now,
+        'sitting': sitting,
+        'since': last['start'] if last else None,
+        'events': len(events),
+        'today': {'sitting': total_sitting, 'standing': total_standing},
+    }
+    if ticker is not None:
+        body['ticker'] = ticker.stats()
+    return '200 OK', _JSON, (json.dumps(body),), ()
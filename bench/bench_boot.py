@@ -0,0 +1,55 @@
+# 启动时间线: 上电到第一次采样、第一次得出在座/离座结论、日志加载完、网页服务可用的虚拟时间
+# 分别用空历史和一年的历史、有人和没人、网络正常和 Wi-Fi 断开的情况启动
+# 改成分阶段启动之前，第一次结论要等滤波窗口按 2 s 周期填满，约 10 s
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+sys.path.insert(0, os.path.dirname(__file__))
+import run as sim_run
+
+sim_run.install()
+import network
+from runner import write_history
+
+START = '2024-01-02 10:00'  # 有效时段内
+SECONDS = 30
+MARKS = ('sensor ready', 'first sample', 'first decision', 'log loaded', 'http server', 'wifi connected',
+         'time synced')
+SCENARIOS = {
+    'sitting, empty log': {'distance': 150},
+    'absent, empty log': {'distance': 1500},
+    'sitting, 1 year log': {'distance': 150, 'days': 365},
+    'sitting, wifi down': {'distance': 150, 'down_s': 600},
+}
+
+
+def simulate(distance, days=0, down_s=0):
+    import tempfile
+    start_local = sim_run.parse_local(START)
+    workdir = tempfile.mkdtemp(prefix='boot-')
+    if days:
+        write_history(workdir, days, start_local)
+    sim = sim_run.Simulation(start_local, distance=lambda t_s: distance, workdir=workdir, quiet=True)
+    network.down_until_us = down_s * 1000000
+    sys.modules.pop('main', None)
+    main = sim.boot()
+    main.timeline.verbose = False
+    sim.execute(sim.run(SECONDS, port=0))
+    return main.timeline, main.sitting
+
+
+def main():
+    print(f"{'scenario':>20} " + ' '.join(f'{name:>14}' for name in MARKS) + f" {'sitting':>8}")
+    for name, scenario in SCENARIOS.items():
+        timeline, sitting = simulate(**scenario)
+        cells = []
+        for mark in MARKS:
+            t = timeline.get(mark)
+            cells.append(f"{'-' if t is None else str(t) + ' ms':>14}")
+        print(f"{name:>20} " + ' '.join(cells) + f" {sitting!s:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# 浏览器轮询首页的开销: 每次重新渲染、片段缓存命中(200) 和带 If-None-Match 的 304 三种情况
+# 输出 requests/sec、服务器侧每次请求的 CPU 时间和每次响应的字节数
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_http import read_response
+from bench_render import synthetic_history
+from day_index import DayIndex
+from http_server import HTTPServer
+from page_cache import PageCache
+import pages
+
+EVENTS = 2000
+POLLS = 300
+
+
+async def poll(port, conditional):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    etag = None
+    size = 0
+    for _ in range(POLLS):
+        request = b'GET / HTTP/1.1\r\nHost: bench\r\n'
+        if conditional and etag:
+            request += b'If-None-Match: ' + etag + b'\r\n'
+        writer.write(request + b'\r\n')
+        await writer.drain()
+        status, n, headers = await read_response(reader, with_headers=True)
+        etag = headers.get(b'etag', etag)
+        size += n
+    writer.close()
+    await writer.wait_closed()
+    # 等服务器读到连接关闭、连接任务自己结束
+    await asyncio.sleep(0.05)
+    return size
+
+
+async def run(mode):
+    events = synthetic_history(EVENTS)
+    index = DayIndex(path=None)
+    index.rebuild(events)
+    cache = PageCache()
+    if mode == 'render':
+        handler = lambda request: ('200 OK', 'text/html', pages.render_page(events, index, True), ())
+    else:
+        # 轮询期间日志没有变化，版本标记保持不变
+        handler = lambda request: pages.status_page(request, cache, events, index, True, None, '1-1-0', 'day-0')
+    server = HTTPServer(port=0, host='127.0.0.1')
+    cpu = [0.0]
+
+    def timed(request):
+        t0 = time.perf_counter()
+        status, content_type, chunks, headers = handler(request)
+        chunks = list(chunks)
+        cpu[0] += time.perf_counter() - t0
+        return status, content_type, chunks, headers
+
+    server.route('/', timed)
+    srv = await server.start()
+    port = srv.sockets[0].getsockname()[1]
+    t0 = time.perf_counter()
+    size = await poll(port, mode == '304')
+    elapsed = time.perf_counter() - t0
+    srv.close()
+    await srv.wait_closed()
+    print(f"{mode:>10} {POLLS / elapsed:>10.1f} {cpu[0] / POLLS * 1000000:>12.1f} {size / POLLS:>10.0f} "
+          f"{cache.hits:>6} {cache.not_modified:>6}")
+
+
+def main():
+    print(f"{'mode':>10} {'req/s':>10} {'handler us':>12} {'body B':>10} {'hits':>6} {'304':>6}")
+    for mode in ('render', 'cached', '304'):
+        asyncio.run(run(mode))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# 导出的峰值内存和吞吐: 按日志长度比较一次性 json.dumps 全部事件与从日志文件流式导出 CSV/NDJSON
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_stream import NullSocket, peak
+from runner import write_history
+from event_store import EventStore
+from http_server import Request
+from response_writer import ResponseWriter
+import export
+
+END = 1717488000  # 2024-06-04
+YEARS = (1, 3, 5)
+
+
+def stream(fn, store, query):
+    sock = NullSocket()
+    _, _, chunks, _ = fn(Request('GET', '/export', query, 'HTTP/1.1', {}), store)
+    ResponseWriter(sock.sendall).write_all(chunks)
+    return sock.received
+
+
+def main():
+    print(f"{'years':>6} {'events':>8} {'dumps peak':>11} {'csv peak':>9} {'csv B':>9} {'csv ms':>7} "
+          f"{'ndjson peak':>12} {'ndjson ms':>10} {'1 month ms':>11}")
+    for years in YEARS:
+        workdir = tempfile.mkdtemp(prefix='export-')
+        write_history(workdir, years * 365, END)
+        store = EventStore(os.path.join(workdir, 'data_log.bin'), legacy_path=None)
+        store.load()
+        dumps_peak = peak(lambda: json.dumps({'events': store.events}))
+        csv_peak = peak(lambda: stream(export.csv, store, {}))
+        t0 = time.perf_counter()
+        csv_bytes = stream(export.csv, store, {})
+        csv_ms = (time.perf_counter() - t0) * 1000
+        ndjson_peak = peak(lambda: stream(export.ndjson, store, {}))
+        t0 = time.perf_counter()
+        stream(export.ndjson, store, {})
+        ndjson_ms = (time.perf_counter() - t0) * 1000
+        # 日期范围从文件里二分查找起点，只读需要的记录
+        t0 = time.perf_counter()
+        stream(export.csv, store, {'from': '2024-05-01', 'to': '2024-05-31'})
+        month_ms = (time.perf_counter() - t0) * 1000
+        print(f"{years:>6} {len(store.events):>8} {dumps_peak:>11} {csv_peak:>9} {csv_bytes:>9} {csv_ms:>7.0f} "
+              f"{ndjson_peak:>12} {ndjson_ms:>10.0f} {month_ms:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
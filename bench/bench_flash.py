@@ -0,0 +1,33 @@
+# 仿真运行一整天(含有效时段)，比较每次采样都写回和按间隔写回时每天写入 flash 的字节数
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+START = '2024-01-02 00:00'  # 工作日
+
+
+def simulate(flush_interval):
+    sim = sim_run.Simulation(sim_run.parse_local(START), quiet=True)
+    sys.modules.pop('main', None)
+    main = sim.boot()
+    main.store.flush_interval = flush_interval
+    store0, index0, writes0 = main.store.bytes_written, main.day_index.bytes_written, main.store.writes
+    sim.execute(sim.run(24 * 3600))
+    main.persist()
+    return (main.store.bytes_written - store0, main.day_index.bytes_written - index0,
+            main.store.writes - writes0, len(main.data_log['events']))
+
+
+def main():
+    print(f"{'flush every':>12} {'journal B/day':>14} {'index B/day':>12} {'writes/day':>11} {'events':>7}")
+    for interval in (0, 60, 300):
+        journal, index, writes, events = simulate(interval)
+        label = 'sample' if interval == 0 else f'{interval} s'
+        print(f"{label:>12} {journal:>14} {index:>12} {writes:>11} {events:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# 本机并发客户端压测 asyncio 服务器，输出 requests/sec 和 p99 延迟
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_render import synthetic_history
+from day_index import DayIndex
+from http_server import HTTPServer
+import pages
+
+CLIENTS = 8
+REQUESTS_PER_CLIENT = 50
+STALLED_CLIENTS = 2
+
+
+async def read_response(reader, with_headers=False):
+    status = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip()
+    chunked = headers.get(b'transfer-encoding') == b'chunked'
+    size = 0
+    while chunked:
+        n = int((await reader.readline()).strip(), 16)
+        await reader.readexactly(n + 2)
+        size += n
+        if n == 0:
+            break
+    if with_headers:
+        return status, size, headers
+    return status, size
+
+
+async def client(port, latencies, keep_alive=True):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    connection = b'keep-alive' if keep_alive else b'close'
+    for i in range(REQUESTS_PER_CLIENT):
+        t0 = time.perf_counter()
+        writer.write(b'GET / HTTP/1.1\r\nHost: bench\r\nConnection: ' + connection + b'\r\n\r\n')
+        await writer.drain()
+        status, _ = await read_response(reader)
+        latencies.append(time.perf_counter() - t0)
+        if not status.startswith(b'HTTP/1.1 200') or not keep_alive:
+            writer.close()
+            if i + 1 < REQUESTS_PER_CLIENT:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.close()
+
+
+async def stalled(port):
+    # 只建立连接不发请求，服务器应在读超时后断开它，且不影响其他客户端
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    await reader.read()
+    writer.close()
+
+
+async def run(keep_alive):
+    events = synthetic_history(2000)
+    index = DayIndex(path=None)
+    index.rebuild(events)
+    server = HTTPServer(port=0, host='127.0.0.1', max_clients=CLIENTS + STALLED_CLIENTS, read_timeout=2)
+    server.route('/', lambda request: ('200 OK', 'text/html', pages.render_page(events, index, True), ()))
+    srv = await server.start()
+    port = srv.sockets[0].getsockname()[1]
+    stalls = [asyncio.ensure_future(stalled(port)) for _ in range(STALLED_CLIENTS)]
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(port, latencies, keep_alive) for _ in range(CLIENTS)))
+    elapsed = time.perf_counter() - t0
+    await asyncio.gather(*stalls)
+    srv.close()
+    await srv.wait_closed()
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{'keep-alive' if keep_alive else 'close':>10} {len(latencies) / elapsed:>10.1f} "
+          f"{p99 * 1000:>10.2f} {server.timeouts:>9} {server.rejected:>9}")
+
+
+def main():
+    print(f"{'mode':>10} {'req/s':>10} {'p99 ms':>10} {'timeouts':>9} {'rejected':>9}")
+    asyncio.run(run(True))
+    asyncio.run(run(False))
+
+
+if __name__ == '__main__':
+    main()
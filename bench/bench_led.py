@@ -0,0 +1,87 @@
+# LED 开销: 仿真几个小时的久坐(会触发闪烁提醒)，统计每小时的 write() 次数、其中输出没变的次数、
+# 阻塞在 bitbang 上的时间，以及 LED 代码和定时器回调里花的真实 CPU 时间
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+sim_run.install()
+import machine
+
+START = '2024-01-02 09:00'  # 有效时段内
+HOURS = 4
+# WS2812 每位 1.25us，24 位一个像素，之后至少 50us 复位；bitbang 期间关中断
+WRITE_US_PER_PIXEL = 30
+WRITE_RESET_US = 50
+
+
+class Meter:
+    # 统计最外层调用的真实耗时，内部互相调用不重复计算
+    def __init__(self):
+        self.us = 0.0
+        self.calls = 0
+        self._depth = 0
+
+    def wrap(self, fn):
+        def wrapped(*args, **kwargs):
+            if self._depth:
+                return fn(*args, **kwargs)
+            self._depth += 1
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.us += (time.perf_counter() - t0) * 1000000
+                self.calls += 1
+                self._depth -= 1
+        wrapped.__wrapped__ = fn
+        return wrapped
+
+
+def simulate():
+    from enhanced_neopixel import EnhancedNeoPixel
+    led = Meter()
+    for name, fn in list(vars(EnhancedNeoPixel).items()):
+        if callable(fn) and not name.startswith('__'):
+            setattr(EnhancedNeoPixel, name, led.wrap(fn))
+    irq = Meter()
+    fire = machine.Timer._fire
+    machine.Timer._fire = irq.wrap(fire)
+    try:
+        # 每段坐 50~70 分钟，超过 45 分钟开始闪烁
+        sim = sim_run.Simulation(sim_run.parse_local(START), distance=sim_run.synthetic_distance(sit_min=(50, 70)),
+                                 quiet=True)
+        sys.modules.pop('main', None)
+        main = sim.boot()
+        strip = main.np.np
+        first = len(strip.writes)
+        sim.execute(sim.run(HOURS * 3600))
+    finally:
+        machine.Timer._fire = fire
+        for name, fn in list(vars(EnhancedNeoPixel).items()):
+            if hasattr(fn, '__wrapped__'):
+                setattr(EnhancedNeoPixel, name, fn.__wrapped__)
+    writes = strip.writes[first:]
+    redundant = sum(1 for i in range(1, len(writes)) if writes[i][1] == writes[i - 1][1])
+    write_us = len(writes) * (strip.n * WRITE_US_PER_PIXEL + WRITE_RESET_US)
+    return {
+        'writes/h': round(len(writes) / HOURS),
+        'unchanged/h': round(redundant / HOURS),
+        'bitbang us/h': round(write_us / HOURS),
+        'led calls/h': round(led.calls / HOURS),
+        'led us/h': round(led.us / HOURS),
+        'timer cb us/h': round(irq.us / HOURS),
+        'timer cb avg us': round(irq.us / max(irq.calls, 1), 1),
+    }
+
+
+def main():
+    for name, value in simulate().items():
+        print(f"{name:>16}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# 网络故障下的启动: 第一次采样的时间、校时完成的时间，以及校时前记录的事件改写后的时间误差
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+sim_run.install()
+import network
+import ntptime
+
+START = '2024-01-02 10:00'  # 有效时段内
+HOURS = 3
+SCENARIOS = {
+    'network ok': {},
+    'wifi down 10 min': {'down_s': 600},
+    'ntp fails 6x': {'ntp_failures': 6},
+    'wifi down 2 h': {'down_s': 7200},
+}
+
+
+def simulate(down_s=0, ntp_failures=0):
+    start_local = sim_run.parse_local(START)
+    sim = sim_run.Simulation(start_local, quiet=True)
+    network.down_until_us = down_s * 1000000
+    ntptime.failures = ntp_failures
+    sys.modules.pop('main', None)
+    main = sim.boot()
+    marks = {}
+    update = main.detector.update
+
+    def traced(distance_mm, now_ms):
+        marks.setdefault('sample', sim.clock.now_us / 1000000)
+        return update(distance_mm, now_ms)
+
+    on_sync = main.connectivity.on_sync
+
+    def synced(delta):
+        marks.setdefault('sync', sim.clock.now_us / 1000000)
+        on_sync(delta)
+
+    main.detector.update = traced
+    main.connectivity.on_sync = synced
+    sim.execute(sim.run(HOURS * 3600))
+    events = main.data_log['events']
+    # 第一条事件在第一次采样时开始，改写后应与真实本地时间一致
+    error = events[0]['start'] - (start_local + int(marks['sample'])) if events else None
+    return marks, error, len(events), main.connectivity
+
+
+def main():
+    print(f"{'scenario':>18} {'first sample s':>15} {'synced s':>9} {'stamp err s':>12} {'events':>7} "
+          f"{'conn fail':>10} {'ntp fail':>9}")
+    for name, scenario in SCENARIOS.items():
+        marks, error, events, conn = simulate(**scenario)
+        print(f"{name:>18} {marks.get('sample', '-'):>15} {marks.get('sync', '-'):>9} {error:>12} {events:>7} "
+              f"{conn.connect_failures:>10} {conn.sync_failures:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# 各电源策略仿真运行一个工作日，用 sim/energy.py 的模型估算每天的 mA·h
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+sim_run.install()
+from power import POLICIES
+
+START = '2024-01-02 00:00'  # 工作日
+
+
+def simulate(policy):
+    import energy
+    sim = sim_run.Simulation(sim_run.parse_local(START), quiet=True)
+    sys.modules.pop('main', None)
+    main = sim.boot()
+    # 换策略: 启动时已按默认策略配置过 Wi-Fi，这里重新应用
+    main.power.policy = policy
+    main.power.options = POLICIES[policy]
+    main.power.wlan.config(pm=main.power.wlan.PM_PERFORMANCE)
+    main.power.apply_wifi()
+    if not main.sampling:
+        main.power.suspend(main.schedule.next_transition(main.utime.time()))
+    sim.execute(sim.run(24 * 3600))
+    return energy.estimate(sim), sim.sensor_model.samples, len(main.data_log['events'])
+
+
+def main():
+    print(f"{'policy':>12} {'cpu':>7} {'wifi':>7} {'sensor':>7} {'led':>7} {'mAh/day':>8} {'samples':>8} {'events':>7}")
+    for policy in POLICIES:
+        mah, samples, events = simulate(policy)
+        print(f"{policy:>12} {mah['cpu']:>7} {mah['wifi']:>7} {mah['sensor']:>7} {mah['led']:>7} "
+              f"{mah['total']:>8} {samples:>8} {events:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# 原始距离记录的开销: 仿真一个工作日，统计每天的样本数、编码字节数、写入 flash 的字节数和次数、
+# 64KB 环形文件能保存几天，以及 add() 与整个 check_sitting 每次采样的 CPU 时间；最后下载一次核对内容
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+sim_run.install()
+from http_server import Request
+
+START = '2024-01-02 00:00'  # 工作日
+HOURS = 24
+
+
+def timed(fn, acc):
+    def wrapped(*args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            acc[0] += time.perf_counter() - t0
+            acc[1] += 1
+    return wrapped
+
+
+def simulate():
+    sim = sim_run.Simulation(sim_run.parse_local(START), quiet=True)
+    sys.modules.pop('main', None)
+    main = sim.boot()
+    recorder = main.recorder
+    recorded = []
+    add_time = [0.0, 0]
+    check_time = [0.0, 0]
+    add = timed(recorder.add, add_time)
+
+    def traced(distance, now, now_ms):
+        recorded.append(distance)
+        return add(distance, now, now_ms)
+
+    recorder.add = traced
+    main.ticker.run = lambda work, run=main.ticker.run: run(timed(work, check_time))
+    sim.execute(sim.run(HOURS * 3600))
+    with sim.firmware_output():
+        main.persist()
+    import export
+    rows = list(export.samples(Request('GET', '/export/samples.csv', {}, 'HTTP/1.1', {}), recorder)[2])[1:]
+    downloaded = [int(row.split(',')[1]) for row in rows]
+    scale = 24 / HOURS
+    days = recorder.blocks * 512 / (recorder.bytes_encoded * scale) if recorder.bytes_encoded else 0
+    return {
+        'samples/day': round(recorder.samples * scale),
+        'encoded B/day': round(recorder.bytes_encoded * scale),
+        'B/sample': round(recorder.bytes_encoded / max(recorder.samples, 1), 2),
+        'flash B/day': round(recorder.bytes_written * scale),
+        'flash writes/day': round(recorder.writes * scale),
+        'ring days': round(days, 1),
+        'add us/sample': round(add_time[0] / max(add_time[1], 1) * 1000000, 2),
+        'check us/sample': round(check_time[0] / max(check_time[1], 1) * 1000000, 1),
+        'download matches': downloaded == recorded[-len(downloaded):] and len(downloaded) == len(recorded),
+    }
+
+
+def main():
+    for name, value in simulate().items():
+        print(f"{name:>17}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# 对比全量扫描与按日索引两种方式渲染状态页的耗时
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from day_index import DayIndex
+import legacy_pages
+
+EVENTS_PER_DAY = 20
+
+
+def synthetic_history(count, end=None):
+    # 每天 EVENTS_PER_DAY 条事件，最后一条落在今天
+    end = end or int(time.time())
+    days = (count + EVENTS_PER_DAY - 1) // EVENTS_PER_DAY
+    day_start = end - end % 86400 - (days - 1) * 86400
+    events = []
+    i = 0
+    while len(events) < count:
+        t = day_start + (i // EVENTS_PER_DAY) * 86400 + 8 * 3600 + (i % EVENTS_PER_DAY) * 900
+        events.append({'type': 'sitting' if i % 2 == 0 else 'standing', 'start': t, 'end': t + 840})
+        i += 1
+    return events
+
+
+def render_full_scan(events):
+    data = {'events': events}
+    filtered, _, _ = legacy_pages.filter_events_by_date(data, time.localtime()[:3])
+    summary = legacy_pages.aggregate_data_by_day(data)
+    rows = [(d, v['sitting'], v['standing']) for d, v in summary.items()]
+    return legacy_pages.generate_event_html(filtered) + legacy_pages.generate_summary_html(rows)
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None or elapsed < best else best
+    return best
+
+
+def main():
+    print(f"{'events':>8} {'full scan ms':>14} {'indexed ms':>12} {'speedup':>8}")
+    for count in (1000, 10000, 100000):
+        events = synthetic_history(count)
+        index = DayIndex(path=None)
+        index.rebuild(events)
+        repeat = 5 if count < 100000 else 2
+        full = best_of(lambda: render_full_scan(events), repeat)
+        indexed = best_of(lambda: legacy_pages.web_page(events, index, True), repeat)
+        print(f"{count:>8} {full * 1000:>14.2f} {indexed * 1000:>12.2f} {full / indexed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# 归档前后的启动开销: 加载日志 + 索引的时间和内存峰值，并检查汇总结果不变
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from day_index import DayIndex, SummaryArchive
+from event_store import EventStore, pack_event
+from retention import Retention
+import legacy_pages
+
+EVENTS_PER_DAY = 20
+KEEP_DAYS = 30
+
+
+def write_history(path, days, now):
+    day0 = now - now % 86400 - days * 86400
+    with open(path, 'wb') as f:
+        for d in range(days + 1):
+            for i in range(EVENTS_PER_DAY):
+                start = day0 + d * 86400 + 9 * 3600 + i * 900
+                f.write(pack_event({'type': 'sitting' if i % 2 == 0 else 'standing', 'start': start, 'end': start + 840}))
+
+
+def boot(tmp):
+    # 与 main.py 启动时相同的加载步骤
+    store = EventStore(os.path.join(tmp, 'data_log.bin'), legacy_path=None)
+    store.load()
+    index = DayIndex(os.path.join(tmp, 'data_index.json'))
+    index.load(store.events)
+    archive = SummaryArchive(os.path.join(tmp, 'data_summary.bin'))
+    return store, index, archive
+
+
+def measure_boot(tmp):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = boot(tmp)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    now = int(time.time())
+    print(f"{'days':>6} {'boot ms before':>15} {'peak KB before':>15} {'boot ms after':>14} {'peak KB after':>14}")
+    for days in (30, 365, 3 * 365):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_history(os.path.join(tmp, 'data_log.bin'), days, now)
+            (store, index, archive), before_s, before_peak = measure_boot(tmp)
+            expected = legacy_pages.aggregate_data_by_day({'events': store.events})
+            asyncio.run(Retention(store, index, archive, keep_days=KEEP_DAYS).compact(now))
+            (store, index, archive), after_s, after_peak = measure_boot(tmp)
+            rows = list(archive.rows()) + index.summary()
+            assert rows == [(k, v['sitting'], v['standing']) for k, v in sorted(expected.items())]
+            print(f"{days:>6} {before_s * 1000:>15.1f} {before_peak / 1024:>15.1f} {after_s * 1000:>14.1f} {after_peak / 1024:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
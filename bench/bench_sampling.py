@@ -0,0 +1,71 @@
+# 固定周期 vs 自适应采样: 仿真一个工作日，统计采样数、I2C 事务、日志写入和状态切换的检测延迟
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+sim_run.install()
+from sampling import AdaptiveSampler
+
+START = '2024-01-02 00:00'  # 工作日
+# 名称里是配置的最坏检测延迟
+POLICIES = {'fixed 2 s': None, 'adaptive 30 s': 30000, 'adaptive 45 s': 45000, 'adaptive 90 s': 90000}
+
+
+def simulate(max_latency_ms):
+    start_local = sim_run.parse_local(START)
+    distance = sim_run.synthetic_distance()
+    sim = sim_run.Simulation(start_local, distance=distance, quiet=True)
+    sys.modules.pop('main', None)
+    main = sim.boot()
+    main.sampler = AdaptiveSampler(base_ms=main.SAMPLE_PERIOD_MS, max_latency_ms=max_latency_ms,
+                                   confirm_ms=main.detector.confirm_ms(main.SAMPLE_PERIOD_MS),
+                                   thresholds_ms=[m * 60000 for m in main.ALERT_MINUTES])
+    # 记录检测器每次切换的虚拟时间
+    detected = []
+    update = main.detector.update
+
+    def traced(distance_mm, now_ms):
+        before = main.detector.present
+        present = update(distance_mm, now_ms)
+        if present != before:
+            detected.append((sim.clock.now_us / 1000000, present))
+        return present
+
+    main.detector.update = traced
+    sim.execute(sim.run(24 * 3600))
+    main.persist()
+    return sim, main, latencies(distance.segments, detected, main.schedule, start_local)
+
+
+def latencies(segments, detected, schedule, start_local):
+    # 只统计有效时段内发生、并在同一时段内被检测到的真实切换
+    result = []
+    for i, (t, _, _) in enumerate(segments[1:], 1):
+        present = i % 2 == 0
+        if not schedule.active(start_local + int(t)):
+            continue
+        for when, state in detected:
+            if when >= t and state == present:
+                if schedule.active(start_local + int(when)) and when - t < 1800:
+                    result.append(when - t)
+                break
+    return sorted(result)
+
+
+def main():
+    print(f"{'policy':>14} {'bound s':>8} {'samples':>8} {'i2c txn':>8} {'flash wr':>9} {'matched':>8} "
+          f"{'mean s':>7} {'p95 s':>6} {'max s':>6}")
+    for name, max_latency_ms in POLICIES.items():
+        sim, fw, lat = simulate(max_latency_ms)
+        mean = sum(lat) / len(lat) if lat else 0
+        p95 = lat[int(len(lat) * 0.95)] if lat else 0
+        bound = (fw.sampler.max_ms + fw.detector.confirm_ms(fw.SAMPLE_PERIOD_MS)) / 1000
+        print(f"{name:>14} {bound:>8} {sim.sensor_model.samples:>8} {sim.bus.transactions:>8} {fw.store.writes:>9} "
+              f"{len(lat):>8} {mean:>7.1f} {p95:>6.1f} {(lat[-1] if lat else 0):>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
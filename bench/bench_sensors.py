@@ -0,0 +1,60 @@
+# 同一总线上三个 VL53L0X: 依次单次测距 vs 重叠的连续测距(轮询 / 中断)，统计每轮的总线时间
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import fake_i2c
+from machine import I2C
+from simclock import clock
+from sensor_manager import SensorManager
+
+SPECS = [('chair', 10, 20), ('mat', 11, 21), ('monitor', 12, 22)]
+DISTANCES = {'chair': 150, 'mat': 900, 'monitor': 600}
+PERIOD_MS = 100
+CYCLES = 50
+
+
+def setup(bus_id, with_irq):
+    bus = fake_i2c.FakeI2CBus()
+    fake_i2c._buses[bus_id] = bus
+    specs = [(name, xshut, irq if with_irq else None) for name, xshut, irq in SPECS]
+    for name, xshut, irq in specs:
+        bus.attach(fake_i2c.VL53L0XModel(distance=DISTANCES[name], xshut_pin=xshut, int_pin=irq))
+    manager = SensorManager(I2C(bus_id), specs)
+    manager.bring_up()
+    assert bus.scan() == [0x30, 0x31, 0x32], bus.scan()
+    return bus, manager
+
+
+def report(name, bus, elapsed_us, latest):
+    assert latest == DISTANCES, latest
+    print(f"{name:>24} {bus.transactions / CYCLES:>10.1f} {bus.bus_time_us / CYCLES:>12.1f} {elapsed_us / CYCLES / 1000:>10.1f}")
+
+
+def main():
+    print(f"{'mode':>24} {'txn/cycle':>10} {'bus us/cycle':>12} {'ms/cycle':>10}")
+
+    bus, manager = setup(10, with_irq=False)
+    bus.reset_stats()
+    t0 = clock.now_us
+    for _ in range(CYCLES):
+        latest = {name: sensor.read() for name, sensor in manager.sensors.items()}
+    report('sequential single-shot', bus, clock.now_us - t0, latest)
+
+    for bus_id, with_irq, label in ((11, False, 'continuous, polled'), (12, True, 'continuous, interrupt')):
+        bus, manager = setup(bus_id, with_irq)
+        manager.start(PERIOD_MS)
+        clock.advance(PERIOD_MS * 1000)
+        bus.reset_stats()
+        t0 = clock.now_us
+        for _ in range(CYCLES):
+            clock.advance(PERIOD_MS * 1000)
+            latest = manager.cycle()
+        report(label, bus, clock.now_us - t0, dict(latest))
+        manager.stop()
+
+
+if __name__ == '__main__':
+    main()
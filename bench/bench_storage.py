@@ -0,0 +1,85 @@
+# 对比旧的 json.dump 全量重写与追加式二进制日志在一小时内的写入量
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from event_store import EventStore
+
+TICK_S = 2
+TICKS_PER_HOUR = 3600 // TICK_S
+
+
+def synthetic_events(count, start=1700000000):
+    events = []
+    t = start
+    for i in range(count):
+        duration = 600 + (i * 37) % 1800
+        events.append({'type': 'sitting' if i % 2 == 0 else 'standing', 'start': t, 'end': t + duration})
+        t += duration + 2
+    return events
+
+
+def hour_of_ticks(start, transition_every=300):
+    # (timestamp, sitting) 序列，每 transition_every 个 tick 换一次状态
+    for i in range(TICKS_PER_HOUR):
+        yield start + i * TICK_S, (i // transition_every) % 2 == 0
+
+
+def run_json(tmp, history):
+    path = os.path.join(tmp, 'data_log.json')
+    data_log = {'events': [dict(e) for e in history]}
+    written = 0
+    start = history[-1]['end'] + TICK_S if history else 1700000000
+    for timestamp, sitting in hour_of_ticks(start):
+        event_type = 'sitting' if sitting else 'standing'
+        if not data_log['events'] or data_log['events'][-1]['type'] != event_type:
+            data_log['events'].append({'type': event_type, 'start': timestamp, 'end': timestamp})
+        data_log['events'][-1]['end'] = timestamp
+        with open(path, 'w') as f:
+            json.dump(data_log, f)
+        written += os.path.getsize(path)
+    return written
+
+
+def run_journal(tmp, history):
+    legacy = os.path.join(tmp, 'data_log.json')
+    with open(legacy, 'w') as f:
+        json.dump({'events': history}, f)
+    store = EventStore(os.path.join(tmp, 'data_log.bin'), legacy_path=legacy)
+    store.load()
+    assert store.events == history
+    store.bytes_written = 0
+    start = history[-1]['end'] + TICK_S if history else 1700000000
+    for timestamp, sitting in hour_of_ticks(start):
+        event_type = 'sitting' if sitting else 'standing'
+        last = store.last()
+        if last is None or last['type'] != event_type:
+            store.append(event_type, timestamp)
+        else:
+            store.extend(timestamp)
+    store.flush()  # 写回还在内存里的未结束事件，计入写入字节数
+    replayed = EventStore(store.path, legacy_path=None).load()
+    assert replayed == store.events
+    return store.bytes_written
+
+
+def main():
+    print(f"{'history':>8} {'json bytes/h':>14} {'journal bytes/h':>16} {'json s':>8} {'journal s':>10}")
+    for count in (100, 1000, 3000):
+        history = synthetic_events(count)
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            json_bytes = run_json(tmp, history)
+            t1 = time.perf_counter()
+        with tempfile.TemporaryDirectory() as tmp:
+            t2 = time.perf_counter()
+            journal_bytes = run_journal(tmp, history)
+            t3 = time.perf_counter()
+        print(f"{count:>8} {json_bytes:>14} {journal_bytes:>16} {t1 - t0:>8.2f} {t3 - t2:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
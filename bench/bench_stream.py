@@ -0,0 +1,65 @@
+# 用 tracemalloc 对比一次性拼接页面与分块流式输出的峰值内存
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from day_index import DayIndex
+from response_writer import ResponseWriter
+import pages
+import legacy_pages
+
+
+def today_history(count):
+    # 所有事件都落在今天，最坏情况下的详情表
+    now = int(time.time())
+    start = now - now % 86400
+    step = max(1, 86000 // count)
+    return [{'type': 'sitting' if i % 2 == 0 else 'standing', 'start': start + i * step, 'end': start + i * step + step - 1}
+            for i in range(count)]
+
+
+class NullSocket:
+    def __init__(self):
+        self.received = 0
+
+    def sendall(self, data):
+        self.received += len(data)
+
+
+def peak(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak_bytes = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak_bytes
+
+
+def main():
+    print(f"{'events':>8} {'page bytes':>12} {'concat peak':>12} {'stream peak':>12}")
+    for count in (100, 1000, 10000):
+        events = today_history(count)
+        index = DayIndex(path=None)
+        index.rebuild(events)
+
+        def concat():
+            sock = NullSocket()
+            sock.sendall(legacy_pages.web_page(events, index, True).encode())
+
+        def stream():
+            sock = NullSocket()
+            writer = ResponseWriter(sock.sendall, buffer_size=512, chunked=True)
+            writer.start()
+            writer.write_all(pages.render_page(events, index, True))
+            stream.size = sock.received
+
+        concat_peak = peak(concat)
+        stream_peak = peak(stream)
+        print(f"{count:>8} {stream.size:>12} {concat_peak:>12} {stream_peak:>12}")
+
+
+if __name__ == '__main__':
+    main()
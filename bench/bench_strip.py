@@ -0,0 +1,90 @@
+# 灯条帧更新开销: 1/8/30/60 像素下各种更新的 Python 侧耗时、是否 write()，以及 bitbang 的阻塞时间
+# 对照组 per-pixel 是逐个像素 np[i] = (r, g, b) 再 write()，即原来单像素代码推广到 N 个的写法
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+sim_run.install()
+from simclock import clock
+
+SIZES = (1, 8, 30, 60)
+REPEAT = 2000
+WRITE_US_PER_PIXEL = 30  # 与 bench_led.py 相同
+WRITE_RESET_US = 50
+
+
+def cases(strip):
+    colors = ('red', 'blue')
+    state = {'i': 0}
+
+    def per_pixel():
+        state['i'] += 1
+        color = (state['i'] & 0xff, 0, 0)
+        for i in range(strip.n):
+            strip.np[i] = color
+        strip.np.write()
+
+    def alternate():
+        state['i'] += 1
+        strip.set_color(colors[state['i'] & 1], 0.5)
+
+    def progress():
+        state['i'] += 1
+        strip.progress(state['i'] % 1000 / 1000, 'green', 0.5)
+
+    def pixel():
+        state['i'] += 1
+        strip.set_pixel(state['i'] % strip.n, colors[state['i'] // strip.n & 1])
+        strip.show()
+
+    def fade_frame():
+        # 一帧渐变: 虚拟时间前进一帧，由 step() 算出新颜色再 show()
+        if strip._anim is None:
+            strip.set_color('black')
+            strip.fade_to('white', duration=10)
+        clock.advance(20000)
+        strip.step(clock.now_us // 1000)
+        strip.show()
+
+    return {
+        'per-pixel': per_pixel,
+        'set_color': alternate,
+        'unchanged': lambda: strip.set_color('cyan', 0.5),
+        'progress': progress,
+        'set_pixel': pixel,
+        'fade frame': fade_frame,
+    }
+
+
+def measure(n):
+    from enhanced_neopixel import EnhancedNeoPixel
+    sim_run.Simulation(0, quiet=True)  # 重置虚拟时钟和 neopixel 记录
+    strip = EnhancedNeoPixel(8, n=n)
+    strip.np.record = False
+    results = {}
+    for name, fn in cases(strip).items():
+        fn()
+        writes = strip.writes
+        t0 = time.perf_counter()
+        for _ in range(REPEAT):
+            fn()
+        us = (time.perf_counter() - t0) * 1000000 / REPEAT
+        results[name] = (us, (strip.writes - writes) / REPEAT if name != 'per-pixel' else 1.0)
+    return results
+
+
+def main():
+    results = {n: measure(n) for n in SIZES}
+    print(f"{'pixels':>7} {'bitbang us':>11} " + ' '.join(f'{name:>16}' for name in results[SIZES[0]]))
+    for n, row in results.items():
+        cells = [f"{us:.1f}us/{w:.2f}w" for us, w in row.values()]
+        print(f"{n:>7} {n * WRITE_US_PER_PIXEL + WRITE_RESET_US:>11} " + ' '.join(f'{c:>16}' for c in cells))
+    print('us = Python 侧每次更新的耗时(CPython)，w = 每次更新平均 write() 次数')
+
+
+if __name__ == '__main__':
+    main()
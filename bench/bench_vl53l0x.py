@@ -0,0 +1,95 @@
+# 在仿真总线上统计 VL53L0X 初始化和每个样本的 I2C 事务数与总线时间
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import fake_i2c
+from machine import I2C, Pin
+from vl53l0x import VL53L0X, PROFILES
+from simclock import clock
+
+SAMPLES = 50
+INT_PIN = 5
+PERIOD_MS = 50
+
+
+def measure(name, sensor, bus, read):
+    bus.reset_stats()
+    for _ in range(SAMPLES):
+        read()
+    print(f"{name:>22} {bus.transactions / SAMPLES:>10.1f} {bus.bus_time_us / SAMPLES:>12.1f}")
+
+
+def measure_init():
+    # 影子寄存器缓存和突发写入开/关两种情况下的 init() 开销，最终寄存器状态必须一致
+    print(f"{'init':>22} {'txn':>10} {'bus us':>12}")
+    states = []
+    for cache in (False, True):
+        bus = fake_i2c.FakeI2CBus()
+        fake_i2c._buses[1] = bus
+        model = fake_i2c.VL53L0XModel()
+        bus.attach(model)
+        VL53L0X(I2C(1), cache=cache)
+        states.append(model.regs)
+        print(f"{'cache=' + str(cache):>22} {bus.transactions:>10} {bus.bus_time_us:>12.1f}")
+    assert states[0] == states[1]
+
+
+def measure_profiles():
+    # 每个配置: 驱动算出的预算、模拟器从寄存器推算的预算、虚拟时钟下实际的采样间隔
+    print(f"{'profile':>22} {'driver us':>10} {'model us':>10} {'sample us':>10}")
+    bus = fake_i2c.FakeI2CBus()
+    fake_i2c._buses[2] = bus
+    model = fake_i2c.VL53L0XModel()
+    bus.attach(model)
+    sensor = VL53L0X(I2C(2))
+    for name in PROFILES:
+        assert sensor.set_profile(name), name
+        driver_us = sensor.get_measurement_timing_budget()
+        model_us = model.timing_budget_us()
+        # 超时寄存器是 尾数<<指数 编码，长预算下有 0.5% 以内的量化误差
+        assert abs(driver_us - PROFILES[name][0]) <= PROFILES[name][0] // 200, (name, driver_us)
+        assert abs(model_us - driver_us) < 100, (name, model_us, driver_us)
+        sensor.start()
+        sensor.read()
+        t0 = clock.now_us
+        for _ in range(10):
+            sensor.read()
+        sensor.stop()
+        print(f"{name:>22} {driver_us:>10} {model_us:>10} {(clock.now_us - t0) // 10:>10}")
+    assert not sensor.set_measurement_timing_budget(0)
+
+
+def main():
+    measure_init()
+    measure_profiles()
+    bus = fake_i2c.bus(0)
+    model = fake_i2c.VL53L0XModel(distance=lambda t: 300 + int(t * 10) % 200, int_pin=INT_PIN)
+    bus.attach(model)
+    sensor = VL53L0X(I2C(0))
+    print(f"{'mode':>22} {'txn/sample':>10} {'bus us/sample':>12}")
+
+    measure('single-shot read()', sensor, bus, sensor.read)
+
+    sensor.start()
+    measure('continuous, polling', sensor, bus, sensor.read)
+    sensor.stop()
+
+    pin = Pin(INT_PIN, Pin.IN, Pin.PULL_UP)
+    samples = []
+    sensor.start_continuous(PERIOD_MS, pin=pin, callback=samples.append)
+
+    def next_sample():
+        # 中断处理函数把结果读进缓冲区，取样本不访问总线
+        clock.advance(PERIOD_MS * 1000)
+        return sensor.get()
+
+    measure('continuous, interrupt', sensor, bus, next_sample)
+    sensor.stop_continuous()
+    assert len(samples) >= SAMPLES and all(100 <= s < 600 for s in samples)
+
+
+if __name__ == '__main__':
+    main()
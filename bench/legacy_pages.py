@@ -0,0 +1,54 @@
+# 全量扫描的旧实现，固件已不再使用，保留在这里作为基准对比的参照
+try:
+    import utime
+except ImportError:
+    import time as utime
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from day_index import date_key
+from pages import event_row, summary_row, render_page, _SUMMARY_HEAD
+
+
+def filter_events_by_date(data, target_date):
+    filtered_events = []
+    total_sitting, total_standing = 0, 0
+    for event in data['events']:
+        start_time = utime.localtime(event['start'])
+        if start_time[:3] == target_date:
+            if event['type'] == 'sitting':
+                total_sitting += event['end'] - event['start']
+            else:
+                total_standing += event['end'] - event['start']
+            filtered_events.append(event)
+    return filtered_events, total_sitting, total_standing
+
+def aggregate_data_by_day(data):
+    daily_summary = {}
+    for event in data['events']:
+        formatted_date = date_key(event['start'])  # 格式化日期
+
+        # 初始化日期键的站立和坐立时间
+        if formatted_date not in daily_summary:
+            daily_summary[formatted_date] = {'sitting': 0, 'standing': 0}
+
+        # 根据事件类型增加对应的时间
+        event_duration = event['end'] - event['start']
+        if event['type'] == 'sitting':
+            daily_summary[formatted_date]['sitting'] += event_duration
+        else:
+            daily_summary[formatted_date]['standing'] += event_duration
+
+    return daily_summary
+
+def generate_event_html(filtered_events):
+    return "".join(event_row(event) for event in filtered_events)
+
+def generate_summary_html(daily_summary):
+    # daily_summary: [(date, sitting, standing), ...]
+    return _SUMMARY_HEAD + "".join(summary_row(*row) for row in daily_summary) + "</table>"
+
+def web_page(events, index, sitting, archive=None):
+    # 一次拼出整页字符串，对比流式输出的峰值内存
+    return "".join(render_page(events, index, sitting, archive))
@@ -0,0 +1,67 @@
+# 把记录下来的距离序列回放给 PresenceDetector，与原来的 200mm 单阈值比较状态切换次数
+# 用法: python bench/replay_presence.py [trace.csv ...]   每行 "t_ms,distance_mm"，# 开头为注释
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from presence import PresenceDetector
+
+TICK_MS = 2000
+
+
+def load_trace(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            t_ms, distance = line.split(',')[:2]
+            yield int(t_ms), int(distance)
+
+
+def synthetic_trace(hours=8, seed=1):
+    # 坐 25~50 分钟、离开 3~10 分钟交替；距离有高斯噪声，偶尔出现 8190 的无效读数和贴近阈值的漂移
+    rng = random.Random(seed)
+    t = 0
+    end = hours * 3600 * 1000
+    sitting = True
+    while t < end:
+        length = rng.randint(25, 50) * 60000 if sitting else rng.randint(3, 10) * 60000
+        base = rng.randint(120, 170) if sitting else rng.randint(230, 800)
+        for t_ms in range(t, min(t + length, end), TICK_MS):
+            d = base + int(rng.gauss(0, 15))
+            if rng.random() < 0.02:
+                d = 8190 if sitting else rng.randint(80, 190)
+            yield t_ms, max(0, d)
+        t += length
+        sitting = not sitting
+
+
+def replay(samples):
+    detector = PresenceDetector()
+    raw_state = False
+    raw_transitions = 0
+    count = 0
+    for t_ms, distance in samples:
+        count += 1
+        if distance > 200 and raw_state:
+            raw_state = False
+            raw_transitions += 1
+        elif distance < 200 and not raw_state:
+            raw_state = True
+            raw_transitions += 1
+        detector.update(distance, t_ms)
+    return count, raw_transitions, detector.transitions
+
+
+def main(paths):
+    traces = [(path, load_trace(path)) for path in paths] or [('synthetic 8h', synthetic_trace())]
+    print(f"{'trace':>20} {'samples':>8} {'raw transitions':>16} {'filtered transitions':>21}")
+    for name, samples in traces:
+        count, raw, filtered = replay(samples)
+        print(f"{os.path.basename(name):>20} {count:>8} {raw:>16} {filtered:>21}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
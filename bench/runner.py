@@ -0,0 +1,156 @@
+# 热点路径基准: 在仿真硬件上加载不同长度的历史，测时间、内存峰值、I2C 和 flash 操作数
+# 用法: python bench/runner.py [--output results.json] [--baseline old.json] [--threshold 0.25]
+# 与 baseline 相比任何指标变差超过 threshold 时返回非零退出码
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, 'sim'))
+import run as sim_run
+
+sim_run.install()
+from event_store import pack_event
+
+EVENTS_PER_DAY = 20
+SIZES = {'day': 1, 'month': 30, 'year': 365, '3years': 3 * 365}
+START = '2024-06-04 10:00'  # 工作日的有效时段内
+# 参与回归比较的指标；计数类指标是确定的，时间类指标有抖动
+COMPARED = ('time_us', 'peak_bytes', 'i2c_txn', 'flash_bytes')
+
+
+def write_history(workdir, days, end):
+    # 结束于 end 之前一天的合成历史，每天 EVENTS_PER_DAY 条
+    day0 = end - end % 86400 - days * 86400
+    with open(os.path.join(workdir, 'data_log.bin'), 'wb') as f:
+        for d in range(days):
+            for i in range(EVENTS_PER_DAY):
+                start = day0 + d * 86400 + 9 * 3600 + i * 900
+                f.write(pack_event({'type': 'sitting' if i % 2 == 0 else 'standing',
+                                    'start': start, 'end': start + 840}))
+
+
+class Firmware:
+    # 以给定历史启动一次 main.py；每个历史长度都重新导入
+    def __init__(self, days):
+        start_local = sim_run.parse_local(START)
+        self.workdir = tempfile.mkdtemp(prefix='bench-')
+        write_history(self.workdir, days, start_local)
+        self.sim = sim_run.Simulation(start_local, workdir=self.workdir, quiet=True)
+        sys.modules.pop('main', None)
+        t0 = time.perf_counter()
+        self.main = self.sim.boot()
+        # 日志在启动后的后台任务里加载，这里直接跑完，算进启动时间
+        with self.sim.firmware_output():
+            self.sim.execute(self.main.load_log())
+        self.boot_s = time.perf_counter() - t0
+        self.main.timer.deinit()
+        self.main.schedule_timer.deinit()
+
+    def counters(self):
+        return self.sim.bus.transactions, self.main.store.bytes_written, self.main.store.writes
+
+
+def measure(fw, fn, repeat):
+    # 先不开 tracemalloc 计时，再单独跑一次测内存峰值
+    i2c0, flash0, writes0 = fw.counters()
+    gc.collect()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - t0) / repeat
+    i2c1, flash1, writes1 = fw.counters()
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'time_us': round(elapsed * 1000000, 1),
+        'peak_bytes': peak,
+        'i2c_txn': round((i2c1 - i2c0) / repeat, 1),
+        'flash_bytes': round((flash1 - flash0) / repeat, 1),
+        'flash_writes': round((writes1 - writes0) / repeat, 1),
+    }
+
+
+def cases(fw):
+    main = fw.main
+    import pages
+    import legacy_pages
+
+    def render():
+        for _ in pages.render_page(main.data_log['events'], main.day_index, main.sitting, main.archive):
+            pass
+
+    return {
+        'check_sitting': main.check_sitting,
+        'update_log': lambda: main.update_log(main.sitting, main.utime.time()),
+        'web_page': render,
+        'aggregate_data_by_day': lambda: legacy_pages.aggregate_data_by_day(main.data_log),
+        'vl53l0x_read': main.sensors.get('chair').read,
+    }
+
+
+def run(sizes, repeat):
+    results = {}
+    for size in sizes:
+        fw = Firmware(SIZES[size])
+        results[f'boot/{size}'] = {'time_us': round(fw.boot_s * 1000000, 1)}
+        with fw.sim.firmware_output():
+            for name, fn in cases(fw).items():
+                results[f'{name}/{size}'] = measure(fw, fn, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    failures = []
+    for key, metrics in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for metric in COMPARED:
+            if metric not in metrics or metric not in old:
+                continue
+            before, after = old[metric], metrics[metric]
+            # 很小的数值不比较相对变化
+            if after > before * (1 + threshold) and after - before > 1:
+                failures.append(f"{key} {metric}: {before} -> {after}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the firmware hot paths on simulated hardware')
+    parser.add_argument('--sizes', default=','.join(SIZES), help='comma separated subset of ' + ','.join(SIZES))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=os.path.join(ROOT, 'bench_results.json'))
+    parser.add_argument('--baseline', help='previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes.split(','), args.repeat)
+    print(f"{'case':>28} {'time us':>10} {'peak B':>9} {'i2c txn':>8} {'flash B':>8}")
+    for key, m in results.items():
+        print(f"{key:>28} {m['time_us']:>10} {m.get('peak_bytes', ''):>9} {m.get('i2c_txn', ''):>8} {m.get('flash_bytes', ''):>8}")
+    with open(args.output, 'w') as f:
+        json.dump({'start': START, 'repeat': args.repeat, 'results': results}, f, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        failures = compare(results, baseline, args.threshold)
+        for failure in failures:
+            print('REGRESSION', failure)
+        if failures:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
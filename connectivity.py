@@ -0,0 +1,106 @@
+# 后台联网和校时: 连接有超时，失败后指数退避重试；校时成功后定期重新同步，校正 RTC 漂移
+import asyncio
+import utime
+import ntptime
+from machine import RTC
+
+
+class Connectivity:
+    # on_connect(): 每次连上 Wi-Fi 后调用；on_sync(delta): 每次校时后调用，delta 是 RTC 被调整的秒数
+    def __init__(self, wlan, ssid, password, servers, tz_offset_s=0, connect_timeout_s=20, retry_s=2,
+                 max_retry_s=300, resync_s=6 * 3600, ntp_timeout_s=1, on_connect=None, on_sync=None):
+        self.wlan = wlan
+        self.ssid = ssid
+        self.password = password
+        self.servers = servers
+        self.tz_offset_s = tz_offset_s
+        self.connect_timeout_ms = connect_timeout_s * 1000
+        self.retry_s = retry_s
+        self.max_retry_s = max_retry_s
+        self.resync_s = resync_s
+        self.ntp_timeout_s = ntp_timeout_s
+        self.on_connect = on_connect
+        self.on_sync = on_sync
+        self.synced = False
+        self.connected = False
+        self.connect_failures = 0
+        self.sync_failures = 0
+        self.syncs = 0
+
+    async def connect(self):
+        if self.wlan.isconnected():
+            if not self.connected:
+                # 启动时已经连着(例如软复位后 Wi-Fi 保持连接)也要通知一次
+                self._connected()
+            return True
+        self.connected = False
+        print('Connecting to network...')
+        self.wlan.active(True)
+        self.wlan.connect(self.ssid, self.password)
+        start = utime.ticks_ms()
+        while not self.wlan.isconnected():
+            if utime.ticks_diff(utime.ticks_ms(), start) > self.connect_timeout_ms:
+                self.wlan.disconnect()
+                self.connect_failures += 1
+                print('Network connect timed out')
+                return False
+            await asyncio.sleep(0.1)
+        self._connected()
+        return True
+
+    def _connected(self):
+        print('Network config:', self.wlan.ifconfig())
+        self.connected = True
+        if self.on_connect is not None:
+            self.on_connect()
+
+    async def sync(self):
+        # ntptime.settime() 是阻塞的 socket 调用: 超时设短，每个服务器最多阻塞 ntp_timeout_s 秒，
+        # 换服务器之前让出执行权，采样和网页不会被连续几个不可达的服务器卡住
+        rtc = RTC()
+        ntptime.timeout = self.ntp_timeout_s
+        for i, server in enumerate(self.servers):
+            if i:
+                await asyncio.sleep(0)
+            try:
+                ntptime.host = server
+                before = utime.time()
+                ntptime.settime()
+                # 与 rtc.datetime() 兼容的本地时间
+                t = utime.localtime(utime.time() + self.tz_offset_s)
+                rtc.datetime((t[0], t[1], t[2], t[6], t[3], t[4], t[5], 0))
+                delta = utime.time() - before
+                print('Synchronized time:', rtc.datetime())
+                self.synced = True
+                self.syncs += 1
+                if self.on_sync is not None:
+                    self.on_sync(delta)
+                return True
+            except Exception as e:
+                # 超时是 OSError；回复太短等异常的数据包会抛 ValueError/IndexError，都换下一个服务器
+                self.sync_failures += 1
+                print(f'Failed to synchronize with {server}: {e}')
+        return False
+
+    async def run(self):
+        # 每 retry_s 秒检查一次连接，断开后立即重连；校时成功后每 resync_s 秒重新同步
+        # 任何异常(例如 ESP32 的 "Wifi Internal Error")都只算一次失败，按退避重试，任务不会退出
+        delay = self.retry_s
+        synced_at = None
+        while True:
+            try:
+                ok = await self.connect()
+                if ok and (synced_at is None or
+                           utime.ticks_diff(utime.ticks_ms(), synced_at) >= self.resync_s * 1000):
+                    ok = await self.sync()
+                    if ok:
+                        synced_at = utime.ticks_ms()
+            except Exception as e:
+                print(f'Error in network task: {e}')
+                ok = False
+            if ok:
+                delay = self.retry_s
+                await asyncio.sleep(self.retry_s)
+            else:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_s)
@@ -0,0 +1,174 @@
+import json
+import os
+import struct
+try:
+    import utime
+except ImportError:
+    import time as utime
+
+_SITTING = 0
+_STANDING = 1
+_FIRST = 2
+
+
+def date_key(timestamp):
+    t = utime.localtime(timestamp)
+    return "{:04d}-{:02d}-{:02d}".format(t[0], t[1], t[2])
+
+
+def key_to_int(key):
+    return int(key[0:4]) * 10000 + int(key[5:7]) * 100 + int(key[8:10])
+
+
+def int_to_key(value):
+    return "{:04d}-{:02d}-{:02d}".format(value // 10000, value // 100 % 100, value % 100)
+
+
+class DayIndex:
+    # 按本地日期维护的汇总: 'YYYY-MM-DD' -> [坐的秒数, 站的秒数, 当天第一条事件的下标]
+    def __init__(self, path='data_index.json'):
+        self.path = path
+        self.days = {}
+        self._open_key = None
+        self.bytes_written = 0
+
+    def add(self, event, offset):
+        key = date_key(event['start'])
+        day = self.days.get(key)
+        if day is None:
+            day = self.days[key] = [0, 0, offset]
+        day[_SITTING if event['type'] == 'sitting' else _STANDING] += event['end'] - event['start']
+        self._open_key = key
+
+    def extend(self, event, delta):
+        # 正在进行的事件延长了 delta 秒，按事件开始日期累加
+        self.days[self._open_key][_SITTING if event['type'] == 'sitting' else _STANDING] += delta
+
+    def forget(self, events, start):
+        # 从汇总里去掉 events[start:]，改过时间戳后再 rebuild(events, start)
+        for offset in range(start, len(events)):
+            event = events[offset]
+            day = self.days.get(date_key(event['start']))
+            if day is not None:
+                day[_SITTING if event['type'] == 'sitting' else _STANDING] -= event['end'] - event['start']
+        for key in list(self.days):
+            if self.days[key][_FIRST] >= start:
+                del self.days[key]
+
+    def rebuild(self, events, start=0):
+        for offset in range(start, len(events)):
+            self.add(events[offset], offset)
+
+    def read(self):
+        # 只读保存的汇总，不需要事件；日志加载完之前网页先用它，最后一天可能还差保存之后的延长
+        try:
+            with open(self.path, 'r') as f:
+                self.days = json.load(f)
+        except (OSError, ValueError):
+            self.days = {}
+
+    def load(self, events):
+        self.read()
+        # 下标与日志对不上(压缩中途断电，索引和日志一新一旧)时整个重建
+        if not self._matches(events):
+            self.days = {}
+        # 保存之后还可能有延长或新事件，从最后一天重新统计
+        start = 0
+        if self.days:
+            start = self.days.pop(max(self.days))[_FIRST]
+        self.rebuild(events, start)
+
+    def _matches(self, events):
+        # 每天记录的下标必须正好是日志里那天的第一条事件
+        for key, day in self.days.items():
+            first = day[_FIRST]
+            if first >= len(events) or date_key(events[first]['start']) != key:
+                return False
+            if first and date_key(events[first - 1]['start']) >= key:
+                return False
+        return True
+
+    def save(self):
+        # 先写临时文件再改名，断电不会留下半个 JSON
+        data = json.dumps(self.days)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.rename(tmp_path, self.path)
+        self.bytes_written += len(data)
+
+    def totals(self, key):
+        day = self.days.get(key)
+        if day is None:
+            return 0, 0
+        return day[_SITTING], day[_STANDING]
+
+    def first_offset(self, key):
+        day = self.days.get(key)
+        return None if day is None else day[_FIRST]
+
+    def drop_before(self, key, cut):
+        # 日志前 cut 条事件被归档后，删掉 key 之前的日期并平移其余日期的下标
+        for day in list(self.days):
+            if day < key:
+                del self.days[day]
+            else:
+                self.days[day][_FIRST] -= cut
+
+    def summary(self):
+        return [(key, self.days[key][_SITTING], self.days[key][_STANDING]) for key in sorted(self.days)]
+
+
+# 归档的每日汇总: 日期(YYYYMMDD) + 坐的秒数 + 站的秒数，追加写入，不整体读进内存
+ARCHIVE_FMT = '<III'
+ARCHIVE_SIZE = struct.calcsize(ARCHIVE_FMT)
+
+
+class SummaryArchive:
+    def __init__(self, path='data_summary.bin'):
+        self.path = path
+        self.count = 0
+        self.last = None
+        try:
+            with open(path, 'rb') as f:
+                size = f.seek(0, 2)
+                self.count = size // ARCHIVE_SIZE
+                if self.count:
+                    f.seek((self.count - 1) * ARCHIVE_SIZE)
+                    self.last = int_to_key(struct.unpack(ARCHIVE_FMT, f.read(ARCHIVE_SIZE))[0])
+        except OSError:
+            pass
+
+    def append(self, key, sitting, standing):
+        # 已经归档过的日期直接跳过，压缩中途断电后重做不会重复
+        if self.last is not None and key <= self.last:
+            return False
+        with open(self.path, 'r+b' if self.count else 'wb') as f:
+            f.seek(self.count * ARCHIVE_SIZE)
+            f.write(struct.pack(ARCHIVE_FMT, key_to_int(key), sitting, standing))
+        self.count += 1
+        self.last = key
+        return True
+
+    def rows(self, start=0, batch=32):
+        # 按批读出 (date, sitting, standing)，内存只占一批
+        if not self.count:
+            return
+        buf = bytearray(ARCHIVE_SIZE * batch)
+        with open(self.path, 'rb') as f:
+            f.seek(start * ARCHIVE_SIZE)
+            remaining = self.count - start
+            while remaining > 0:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                usable = min(n // ARCHIVE_SIZE, remaining)
+                for i in range(usable):
+                    date, sitting, standing = struct.unpack_from(ARCHIVE_FMT, buf, i * ARCHIVE_SIZE)
+                    yield int_to_key(date), sitting, standing
+                remaining -= usable
+                if n < len(buf):
+                    break
+
+    def tail(self, n):
+        return self.rows(max(0, self.count - n))
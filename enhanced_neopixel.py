@@ -1,6 +1,66 @@
-from machine import Pin, Timer
+# WS2812 灯条: 颜色先按亮度缩放再查 gamma 表，写进 NeoPixel 自己的 buf(就是帧缓冲)，
+# 一帧里的所有修改最后只 write() 一次，输出和上次一样时不写(bitbang 期间会关中断)
+# 闪烁、渐变和呼吸由同一个 FrameScheduler 任务按需驱动，不占用硬件定时器
+import asyncio
+import utime
+from machine import Pin
 from neopixel import NeoPixel
 
+GAMMA = 2.2
+FRAME_MS = 20  # 渐变和呼吸的帧间隔
+
+_tables = {}
+
+
+def gamma_table(gamma=GAMMA):
+    # 0~255 的线性值到 PWM 输出的查找表，同一个 gamma 只算一次
+    table = _tables.get(gamma)
+    if table is None:
+        table = bytes(int((i / 255) ** gamma * 255 + 0.5) for i in range(256))
+        _tables[gamma] = table
+    return table
+
+
+class FrameScheduler:
+    # 所有 LED 共用一个任务: 每帧让有动画的 LED 算出下一帧，按最近的下一帧时间睡眠，没有动画时一直等
+    def __init__(self):
+        self.strips = []
+        self._wake = asyncio.Event()
+        self.frames = 0
+        self.frame_us = 0
+        self.frame_max_us = 0
+
+    def add(self, strip):
+        self.strips.append(strip)
+
+    def wake(self):
+        self._wake.set()
+
+    async def run(self):
+        while True:
+            t0 = utime.ticks_us()
+            now = utime.ticks_ms()
+            delay = None
+            for strip in self.strips:
+                d = strip.step(now)
+                strip.show()
+                if d is not None and (delay is None or d < delay):
+                    delay = d
+            us = utime.ticks_diff(utime.ticks_us(), t0)
+            self.frames += 1
+            self.frame_us += us
+            if us > self.frame_max_us:
+                self.frame_max_us = us
+            self._wake.clear()
+            if delay is None:
+                await self._wake.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(delay, 1) / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+
 class EnhancedNeoPixel:
     PRESET_COLORS = {
         'red': (255, 0, 0),
@@ -13,60 +73,162 @@ class EnhancedNeoPixel:
         'black': (0, 0, 0),
     }
 
-    def __init__(self, pin):
-        self.np = NeoPixel(Pin(pin), 1)
-        self.clear()
-        self.timer = Timer(0)
+    def __init__(self, pin, n=1, gamma=GAMMA, scheduler=None):
+        # 多个灯条应传入同一个 scheduler，只跑一个 scheduler.run() 任务
+        self.np = NeoPixel(Pin(pin), n)
+        self.n = n
+        self.buf = self.np.buf
+        self._order = self.np.ORDER[:3]
+        self._pixel = bytearray(3)
+        self._shown = bytearray(len(self.buf))  # 上一次 write() 的内容
+        self._dirty = True
+        self.lut = gamma_table(gamma)
+        self.scheduler = scheduler or FrameScheduler()
+        self.scheduler.add(self)
+        self.value = (0, 0, 0)  # 整条统一颜色时查表前的线性值，渐变在这个空间里插值
+        self._anim = None
+        self.writes = 0
         self.blinking = False
+        self.clear()
 
-    def set_color(self, color, brightness=1.0):
+    def _scale(self, color, brightness):
         if isinstance(color, str):
             color = self.PRESET_COLORS.get(color, (0, 0, 0))
-        color = tuple(int(c * brightness) for c in color)
-        self.np[0] = color
-        self.np.write()
+        level = int(brightness * 255)
+        level = 0 if level < 0 else 255 if level > 255 else level
+        return (color[0] * level // 255, color[1] * level // 255, color[2] * level // 255)
+
+    def _put(self, value, start, end):
+        # 把 [start, end) 的像素设成同一个值: 先写第一个像素，再成倍复制，不分配内存
+        lut = self.lut
+        pixel = self._pixel
+        order = self._order
+        pixel[order[0]] = lut[value[0]]
+        pixel[order[1]] = lut[value[1]]
+        pixel[order[2]] = lut[value[2]]
+        if end <= start:
+            return
+        length = (end - start) * 3
+        start *= 3
+        mv = memoryview(self.buf)
+        mv[start:start + 3] = pixel
+        done = 3
+        while done < length:
+            k = min(done, length - done)
+            mv[start + done:start + done + k] = mv[start:start + k]
+            done += k
+        self._dirty = True
+
+    def _show(self, value):
+        self.value = value
+        self._put(value, 0, self.n)
+
+    def show(self):
+        # 一帧的修改都写进帧缓冲之后调用一次
+        if not self._dirty:
+            return
+        self._dirty = False
+        if self.buf != self._shown or not self.writes:  # 第一次总是写，覆盖上电时的状态
+            self.np.write()
+            self._shown[:] = self.buf
+            self.writes += 1
+
+    def fill(self, color, brightness=1.0, start=0, end=None):
+        # 设置一段像素，不会立即写出，改完后调用 show()
+        self._anim = None
+        self.blinking = False
+        end = self.n if end is None else min(end, self.n)
+        value = self._scale(color, brightness)
+        if start <= 0 and end == self.n:
+            self.value = value
+        self._put(value, start, end)
+
+    def set_pixel(self, index, color, brightness=1.0):
+        self.fill(color, brightness, index, index + 1)
+
+    def progress(self, fraction, color, brightness=1.0, background='black', background_brightness=1.0):
+        # 进度条: 前 fraction*n 个像素点亮，最后一个按余下的比例调暗，其余显示背景色
+        self._anim = None
+        self.blinking = False
+        fraction = 0.0 if fraction < 0 else 1.0 if fraction > 1 else fraction
+        lit = int(fraction * self.n * 256)
+        full = lit >> 8
+        value = self._scale(color, brightness)
+        self.value = value
+        self._put(value, 0, full)
+        if full < self.n:
+            part = lit & 0xff
+            self._put(tuple(c * part >> 8 for c in value), full, full + 1)
+            self._put(self._scale(background, background_brightness), full + 1, self.n)
+        self.show()
+
+    def _start(self, anim):
+        # 同样的动画正在播放时不重新开始，每次采样都调用也不会打乱节奏
+        if self._anim is not None and self._anim[:-1] == anim:
+            return
+        self._anim = anim + (utime.ticks_ms(),)
+        self.step(self._anim[-1])
+        self.show()
+        self.scheduler.wake()
+
+    def step(self, now):
+        # 由 FrameScheduler 调用；返回距下一帧的毫秒数，没有动画时返回 None
+        anim = self._anim
+        if anim is None:
+            return None
+        kind, a, b, period, count, start = anim
+        elapsed = utime.ticks_diff(now, start)
+        if kind == 'blink':
+            # count 个亮灭周期后停止，count=0 表示一直闪
+            phase = elapsed // period
+            if count and phase >= count * 2:
+                self.stop_blinking()
+                return None
+            self._show(a if phase % 2 == 0 else b)
+            return period - elapsed % period
+        if kind == 'fade':
+            if elapsed >= period:
+                self._anim = None
+                self._show(b)
+                return None
+            f = elapsed * 256 // period
+        else:  # pulse: 三角波，period 毫秒一个来回
+            f = elapsed % period * 512 // period
+            if f > 256:
+                f = 512 - f
+        self._show(tuple(a[i] + ((b[i] - a[i]) * f >> 8) for i in range(3)))
+        return FRAME_MS
+
+    def set_color(self, color, brightness=1.0):
+        self._anim = None
+        self.blinking = False
+        self._show(self._scale(color, brightness))
+        self.show()
 
     def clear(self):
         self.set_color('black')
 
-    def blink(self, color, times, interval, brightness=1.0):
-        self.blink_count = 0
-        self.blink_times = times
-        self.blink_color = color
-        self.blink_interval = interval
-        self.blink_brightness = brightness
-        self.blinking = True
-        self.timer.init(period=int(interval * 1000), mode=Timer.PERIODIC, callback=self._blink_callback)
-
-    def _blink_callback(self, timer):
-        if self.blink_count >= self.blink_times * 2:
-            self.timer.deinit()
-            self.clear()
-            self.blinking = False
+    def fade_to(self, color, brightness=1.0, duration=0.5):
+        target = self._scale(color, brightness)
+        anim = self._anim
+        if (anim is None and target == self.value) or (anim is not None and anim[0] == 'fade' and anim[2] == target):
             return
+        self.blinking = False
+        self._anim = None
+        self._start(('fade', self.value, target, max(int(duration * 1000), 1), 0))
 
-        if self.blink_count % 2 == 0:
-            self.set_color(self.blink_color, self.blink_brightness)
-        else:
-            self.clear()
+    def pulse(self, color, period=2.0, brightness=1.0, low=0.1):
+        self.blinking = False
+        self._start(('pulse', self._scale(color, brightness * low), self._scale(color, brightness),
+                     max(int(period * 1000), 2), 0))
 
-        self.blink_count += 1
+    def blink(self, color, times, interval, brightness=1.0):
+        self.blinking = True
+        self._start(('blink', self._scale(color, brightness), (0, 0, 0), max(int(interval * 1000), 1), times))
 
     def start_blinking(self, color, interval, brightness=1.0):
-        self.blink_color = color
-        self.blink_interval = interval
-        self.blink_brightness = brightness
         self.blinking = True
-        self.timer.init(period=int(interval * 1000), mode=Timer.PERIODIC, callback=self._continuous_blink_callback)
+        self._start(('blink', self._scale(color, brightness), (0, 0, 0), max(int(interval * 1000), 1), 0))
 
     def stop_blinking(self):
-        self.timer.deinit()
         self.clear()
-        self.blinking = False
-
-    def _continuous_blink_callback(self, timer):
-        if self.blinking:
-            if self.np[0] == (0, 0, 0):
-                self.set_color(self.blink_color, self.blink_brightness)
-            else:
-                self.clear()
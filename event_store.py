@@ -0,0 +1,201 @@
+import struct
+import json
+import os
+
+# 定长记录: 类型(1字节) + 开始时间(4字节) + 结束时间(4字节)
+RECORD_FMT = '<BII'
+RECORD_SIZE = struct.calcsize(RECORD_FMT)
+_END_OFFSET = 5
+_READ_BATCH = 64
+
+EVENT_TYPES = ('standing', 'sitting')
+
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+def pack_event(event):
+    return struct.pack(RECORD_FMT, EVENT_TYPES.index(event['type']), event['start'], event['end'])
+
+
+class EventStore:
+    # flush_interval: 正在进行的事件的结束时间在内存里最多攒多少秒再写入，0 表示每次都写
+    def __init__(self, path='data_log.bin', legacy_path='data_log.json', flush_interval=60):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.flush_interval = flush_interval
+        self.events = []
+        self._size = 0  # 有效记录的字节数，文件尾部的半条记录会被覆盖
+        self._flushed_end = 0  # 文件里最后一条记录的结束时间
+        self.dirty = False
+        self.bytes_written = 0
+        self.writes = 0
+
+    def load(self):
+        for _ in self._load():
+            pass
+        return self.events
+
+    async def load_async(self):
+        # 启动时在后台加载，每读一批让出一次，采样不用等日志加载完
+        import asyncio
+        for _ in self._load():
+            await asyncio.sleep(0)
+        return self.events
+
+    def _load(self):
+        if not _exists(self.path):
+            if self.legacy_path and _exists(self.legacy_path):
+                self.migrate(self.legacy_path)
+            else:
+                open(self.path, 'wb').close()
+        events = []
+        buf = bytearray(RECORD_SIZE * _READ_BATCH)
+        with open(self.path, 'rb') as f:
+            # 先按文件大小定下记录数，加载期间 scan() 已经可以直接读文件
+            size = f.seek(0, 2)
+            self._size = size - size % RECORD_SIZE
+            f.seek(0)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                for offset in range(0, n - n % RECORD_SIZE, RECORD_SIZE):
+                    type_id, start, end = struct.unpack_from(RECORD_FMT, buf, offset)
+                    events.append({'type': EVENT_TYPES[type_id], 'start': start, 'end': end})
+                if n < len(buf):
+                    break
+                yield
+        self.events = events
+        self._size = len(events) * RECORD_SIZE
+        self._flushed_end = events[-1]['end'] if events else 0
+        self.dirty = False
+
+    def migrate(self, legacy_path):
+        # 一次性把旧的 data_log.json 转成二进制日志，旧文件改名保留
+        with open(legacy_path, 'r') as f:
+            data = json.load(f)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for event in data.get('events', []):
+                f.write(pack_event(event))
+        os.rename(tmp_path, self.path)
+        os.rename(legacy_path, legacy_path + '.bak')
+        print(f"Migrated {len(data.get('events', []))} events from {legacy_path}")
+
+    def _write_at(self, offset, data):
+        with open(self.path, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+        self.bytes_written += len(data)
+        self.writes += 1
+
+    def append(self, event_type, start, end=None):
+        # 状态切换: 先把上一条事件的结束时间落盘
+        self.flush()
+        event = {'type': event_type, 'start': start, 'end': start if end is None else end}
+        self._write_at(self._size, pack_event(event))
+        self._size += RECORD_SIZE
+        self._flushed_end = event['end']
+        self.events.append(event)
+        return event
+
+    def extend(self, end):
+        # 结束时间先只改内存，超过 flush_interval 秒才写回
+        self.events[-1]['end'] = end
+        self.dirty = True
+        if end - self._flushed_end >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        # 只改写最后一条记录的结束时间(4字节)，断电最多丢失 flush_interval 秒
+        if not self.dirty:
+            return
+        end = self.events[-1]['end']
+        self._write_at(self._size - RECORD_SIZE + _END_OFFSET, struct.pack('<I', end))
+        self._flushed_end = end
+        self.dirty = False
+
+    def restamp(self, first, delta):
+        # 校时前记录的事件 events[first:] 整体平移 delta 秒，并改写对应的记录
+        events = self.events
+        for event in events[first:]:
+            event['start'] += delta
+            event['end'] += delta
+        with open(self.path, 'r+b') as f:
+            f.seek(first * RECORD_SIZE)
+            for event in events[first:]:
+                f.write(pack_event(event))
+        self.bytes_written += (len(events) - first) * RECORD_SIZE
+        self.writes += 1
+        if events:
+            self._flushed_end = events[-1]['end']
+        self.dirty = False
+
+    def last(self):
+        return self.events[-1] if self.events else None
+
+    def scan(self, start=0, stop=None):
+        # 按开始时间 [start, stop) 从文件逐批读出 (类型, 开始, 结束)，内存占用与日志长度无关
+        # 只读调用时已写入的记录；正在进行的事件的结束时间以内存为准(可能还没写回)
+        count = self._size // RECORD_SIZE
+        # 开始时的最后一条事件: 输出期间可能又追加了新事件，只有这一条的结束时间从内存取
+        # 它不再是最后一条时内存里的结束时间也已经是最终值；日志还没加载进内存时全部以文件为准
+        last = self.events[-1] if count and len(self.events) == count else None
+        buf = bytearray(RECORD_SIZE * _READ_BATCH)
+        with open(self.path, 'rb') as f:
+            i = self._find(f, start, count)
+            f.seek(i * RECORD_SIZE)
+            while i < count:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                for offset in range(0, n - n % RECORD_SIZE, RECORD_SIZE):
+                    type_id, begin, end = struct.unpack_from(RECORD_FMT, buf, offset)
+                    if i >= count or (stop is not None and begin >= stop):
+                        return
+                    if i == count - 1 and last is not None:
+                        end = last['end']
+                    yield EVENT_TYPES[type_id], begin, end
+                    i += 1
+
+    def _find(self, f, timestamp, count):
+        # 记录按开始时间递增，在文件里二分查找第一条 start >= timestamp 的记录
+        rec = bytearray(RECORD_SIZE)
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid * RECORD_SIZE)
+            f.readinto(rec)
+            if struct.unpack_from(RECORD_FMT, rec)[1] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def replace(self, new_path, cut):
+        # 压缩完成: 用只含 events[cut:] 的新文件替换日志
+        # 新文件是按内存里的事件写的，已经包含未落盘的结束时间
+        # 换成新的列表而不是原地删除: 正在流式输出的网页和 API 还在按下标读旧列表；调用方要更新自己持有的引用
+        os.rename(new_path, self.path)
+        self.events = self.events[cut:]
+        self._size = len(self.events) * RECORD_SIZE
+        self._flushed_end = self.events[-1]['end'] if self.events else 0
+        self.dirty = False
+
+
+def find_start(events, timestamp, lo=0):
+    # 事件按开始时间递增，二分查找第一条 start >= timestamp 的下标
+    hi = len(events)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if events[mid]['start'] < timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
@@ -0,0 +1,75 @@
+# 导出事件历史: /export.csv 和 /export.ndjson，?from=YYYY-MM-DD&to=YYYY-MM-DD(都包含，按本地日期)
+# 直接从日志文件逐批读出边读边输出，内存占用与历史长度无关；更早的已归档日期只有每天的合计，见 /api/summary
+# /export/samples.csv 导出原始距离记录(recorder.py)，同样的日期参数
+try:
+    import utime
+except ImportError:
+    import time as utime
+from pages import format_datetime
+
+CSV_HEADER = 'type,start,end,duration_s,date,start_local,end_local\n'
+
+
+def parse_date(text):
+    # 'YYYY-MM-DD' -> 当天本地 0 点的时间戳
+    year, month, day = text.split('-')
+    return utime.mktime((int(year), int(month), int(day), 0, 0, 0, 0, 0, -1))
+
+
+def _range(params):
+    start = params.get('from')
+    stop = params.get('to')
+    start = parse_date(start) if start else 0
+    stop = parse_date(stop) + 86400 if stop else None
+    return start, stop
+
+
+def _rows(store, start, stop):
+    # 每条事件的本地时间只格式化一次，CSV 和 NDJSON 共用
+    for type_name, begin, end in store.scan(start, stop):
+        start_local = format_datetime(utime.localtime(begin))
+        yield type_name, begin, end, start_local, format_datetime(utime.localtime(end))
+
+
+def _csv_rows(store, start, stop):
+    yield CSV_HEADER
+    for type_name, begin, end, start_local, end_local in _rows(store, start, stop):
+        yield f'{type_name},{begin},{end},{end - begin},{start_local[:10]},{start_local},{end_local}\n'
+
+
+def _ndjson_rows(store, start, stop):
+    # 字段都是数字或固定格式的字符串，不需要转义
+    for type_name, begin, end, start_local, end_local in _rows(store, start, stop):
+        yield (f'{{"type":"{type_name}","start":{begin},"end":{end},"duration_s":{end - begin},'
+               f'"date":"{start_local[:10]}","start_local":"{start_local}","end_local":"{end_local}"}}\n')
+
+
+def _export(request, store, content_type, rows, filename):
+    try:
+        start, stop = _range(request.query)
+    except (ValueError, OverflowError) as e:
+        return '400 Bad Request', 'text/plain', (f'bad date: {e}',), ()
+    headers = (('Content-Disposition', f'attachment; filename="{filename}"'),)
+    return '200 OK', content_type, rows(store, start, stop), headers
+
+
+def csv(request, store):
+    return _export(request, store, 'text/csv', _csv_rows, 'events.csv')
+
+
+def ndjson(request, store):
+    return _export(request, store, 'application/x-ndjson', _ndjson_rows, 'events.ndjson')
+
+
+def _sample_rows(recorder, start, stop):
+    # 与 sim/run.py --trace 和 bench/replay_presence.py 的格式相同: t_ms 相对第一条样本，第三列是 epoch 毫秒
+    yield '# t_ms,distance_mm,epoch_ms\n'
+    first = None
+    for t_ms, distance in recorder.read(start, stop):
+        if first is None:
+            first = t_ms
+        yield f'{t_ms - first},{distance},{t_ms}\n'
+
+
+def samples(request, recorder):
+    return _export(request, recorder, 'text/csv', _sample_rows, 'samples.csv')
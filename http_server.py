@@ -0,0 +1,154 @@
+import asyncio
+from response_writer import ResponseWriter
+
+_MAX_HEADERS = 32
+
+
+class Request:
+    def __init__(self, method, path, query, version, headers):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.version = version
+        self.headers = headers
+
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+
+def parse_query(qs):
+    params = {}
+    for pair in qs.split('&'):
+        if not pair:
+            continue
+        name, _, value = pair.partition('=')
+        params[name] = value
+    return params
+
+
+class HTTPServer:
+    # 基于 asyncio 的小型服务器: 每个连接一个任务，带读写超时、并发上限和 keep-alive
+    def __init__(self, port=80, host='0.0.0.0', max_clients=4, read_timeout=5, write_timeout=10,
+                 idle_timeout=15, buffer_size=512):
+        self.port = port
+        self.host = host
+        self.max_clients = max_clients
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.idle_timeout = idle_timeout
+        self.buffer_size = buffer_size
+        self.routes = {}
+        self.active = 0
+        self.requests = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.bad_requests = 0
+        self.server = None
+
+    def route(self, path, handler):
+        # handler(request) -> (status, content_type, chunks, headers)
+        self.routes[path] = handler
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._client, self.host, self.port)
+        return self.server
+
+    async def _read_request(self, reader, timeout):
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        if not line:
+            return None
+        parts = line.decode().split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise ValueError('bad request line')
+        method, target, version = parts
+        path, _, query = target.partition('?')
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.read_timeout)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= _MAX_HEADERS:
+                raise ValueError('too many headers')
+            name, _, value = line.decode().partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length:
+            # 请求体不使用，读掉以便复用连接
+            await asyncio.wait_for(reader.readexactly(length), self.read_timeout)
+        return Request(method, path, parse_query(query), version, headers)
+
+    def _dispatch(self, request):
+        handler = self.routes.get(request.path)
+        if handler is None:
+            return '404 Not Found', 'text/plain', ('Not Found',), ()
+        return handler(request)
+
+    async def _respond(self, writer, request, status, content_type, chunks, headers, keep_alive):
+        # chunked 只用于 HTTP/1.1，HTTP/1.0 的响应体靠断开连接结束；HEAD 只发头部，页面也不渲染
+        body = request.method != 'HEAD'
+        response = ResponseWriter(writer.write, self.buffer_size, chunked=request.version == 'HTTP/1.1')
+        response.start(status, content_type, headers, keep_alive=keep_alive, body=body)
+        for chunk in chunks if response.body else ():
+            response.write(chunk)
+            if response.flushed:
+                response.flushed = False
+                await asyncio.wait_for(writer.drain(), self.write_timeout)
+        response.close()
+        await asyncio.wait_for(writer.drain(), self.write_timeout)
+        return response.keep_alive
+
+    async def _client(self, reader, writer):
+        if self.active >= self.max_clients:
+            self.rejected += 1
+            try:
+                writer.write(b'HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await asyncio.wait_for(writer.drain(), self.write_timeout)
+            except Exception:
+                pass
+            await self._close(writer)
+            return
+        self.active += 1
+        try:
+            timeout = self.read_timeout
+            while True:
+                try:
+                    request = await self._read_request(reader, timeout)
+                except ValueError as e:
+                    # 请求行或头部格式错误(包括 "GET /" 这种没有版本号的)，回 400 后关闭连接
+                    self.bad_requests += 1
+                    writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Type: text/plain\r\nConnection: close\r\n\r\n'
+                                 + str(e).encode())
+                    await asyncio.wait_for(writer.drain(), self.write_timeout)
+                    break
+                if request is None:
+                    break
+                keep_alive = request.keep_alive()
+                try:
+                    status, content_type, chunks, headers = self._dispatch(request)
+                except Exception as e:
+                    print(f"Error handling request: {e}")
+                    status, content_type, chunks, headers = '500 Internal Server Error', 'text/plain', (str(e),), ()
+                # 响应体只能靠断开连接结束时不能复用连接
+                keep_alive = await self._respond(writer, request, status, content_type, chunks, headers, keep_alive)
+                self.requests += 1
+                if not keep_alive:
+                    break
+                # 之后的请求允许在空闲超时内到达
+                timeout = self.idle_timeout
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        except Exception as e:
+            print(f"Error handling request: {e}")
+        finally:
+            self.active -= 1
+            await self._close(writer)
+
+    async def _close(self, writer):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
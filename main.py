@@ -1,249 +1,415 @@
-from machine import I2C, Pin, Timer, RTC
+from machine import I2C, Pin, Timer
 import utime
-import network, ntptime
-from vl53l0x import VL53L0X
-from enhanced_neopixel import EnhancedNeoPixel
-import socket
-import json
+from timeline import Timeline
+# 启动时间线，各阶段完成时打印从上电起的毫秒数
+timeline = Timeline()
+import network
+from sensor_manager import SensorManager
+from presence import PresenceDetector
+from enhanced_neopixel import EnhancedNeoPixel, FrameScheduler
+from event_store import EventStore
+from day_index import DayIndex, SummaryArchive, date_key
+from ticker import Ticker
+from recorder import SampleRecorder
+from schedule import Schedule
+from power import PowerManager
+from sampling import AdaptiveSampler
+from connectivity import Connectivity
+import asyncio
+# 网页相关的模块(http_server/pages/api)和 retention 在检测开始之后才导入
+timeline.mark('imports')
 # LED初始化
 led = Pin(8, Pin.OUT)
-np = EnhancedNeoPixel(8)
+leds = FrameScheduler()  # 所有 LED 动画共用一个任务
+LED_PIXELS = 1  # 桌上装灯条时改成像素数，按坐着的时间显示进度条
+np = EnhancedNeoPixel(8, n=LED_PIXELS, scheduler=leds)
 
 
-# 时间同步设置
-def set_time():
-    time_zone_offset = 8 * 3600  # 设置时区偏移，对于中国为UTC+8
-    ntp_servers = ['cn.pool.ntp.org', 'ntp1.aliyun.com', 'time.windows.com', 'pool.ntp.org']
-    rtc = RTC()
-    print('Before synchronized time:', rtc.datetime())
-    while True:
-        try:
-            for server in ntp_servers:
-                ntptime.host = server  # 设置 NTP 服务器
-                ntptime.settime()
-                print('Synchronized utc time:', rtc.datetime())
-                current_time = utime.time() + time_zone_offset
-                local_time = utime.localtime(current_time)
-                # 将 local_time 转换为与 rtc.datetime() 兼容的格式
-                rtc_time = (local_time[0], local_time[1], local_time[2], local_time[6] , local_time[3], local_time[4], local_time[5], 0)
-                rtc.datetime(rtc_time)
-                print('Synchronized time:', rtc.datetime())
-                return
-        except OSError:
-            print('Failed to synchronize')
-            utime.sleep(2)
-
-# Wi-Fi连接函数
-def connect_wifi(ssid, password):
-    sta_if = network.WLAN(network.STA_IF)
-    if not sta_if.isconnected():
-        print('Connecting to network...')
-        sta_if.active(True)
-        sta_if.connect(ssid, password)
-        while not sta_if.isconnected():
-            pass
-    print('Network config:', sta_if.ifconfig())
-    np.start_blinking('green', 1, brightness=0.5)
-    set_time()
-    np.stop_blinking()
-
-connect_wifi('KuroGalaxy', '05722067')
-
-
-
-# VL53L0X传感器初始化
+# 联网和校时在后台任务里进行(见 connectivity.py)，没有网络时也立即开始检测
+WIFI_SSID = 'KuroGalaxy'
+WIFI_PASSWORD = '05722067'
+NTP_SERVERS = ('cn.pool.ntp.org', 'ntp1.aliyun.com', 'time.windows.com', 'pool.ntp.org')
+TIME_ZONE_OFFSET = 8 * 3600  # 设置时区偏移，对于中国为UTC+8
+# RTC 掉电后从 2000 年开始走，早于这一年说明还没校时(软复位后 RTC 的时间仍然有效)
+MIN_VALID_YEAR = 2024
+time_valid = utime.localtime()[0] >= MIN_VALID_YEAR
+
+
+# VL53L0X传感器初始化: (名称, XSHUT 引脚, GPIO1 中断引脚[, 测距配置])，多个传感器时必须接 XSHUT
+# 测距配置可选 'fast' / 'default' / 'accurate' / 'long_range'，省略则保持上电默认
+SENSORS = [('chair', None, None)]
 i2c = I2C(0, scl=Pin(3), sda=Pin(4))
-sensor = VL53L0X(i2c)
+sensors = SensorManager(i2c, SENSORS)
+sensors.bring_up()
+timeline.mark('sensor ready')
+# 有效时段外停止测距，长时间没人降低采样率，Wi-Fi 省电；可选 'performance' / 'balanced' / 'low_power'
+POWER_POLICY = 'balanced'
+SAMPLE_PERIOD_MS = 2000
+wlan = network.WLAN(network.STA_IF)
+power = PowerManager(sensors, wlan, policy=POWER_POLICY)
 
 is_start_time = True # every time boot or start working
-def is_within_active_hours(current_time):
-    global is_start_time
-    # 检测是否为工作日的有效工作时间
-    hour = current_time[3]
-    minute = current_time[4]
-    weekday = current_time[6]
-    if weekday >= 5:
-        return False
-    # 早上9点到晚上5点半，中午12到2点不记录
-    if hour < 9 or hour > 17 or (hour == 17 and minute > 30):
-        is_start_time = True
-        return False
-    # if hour == 11 and minute >= 30:
-    #     return True
-    if 12 <= hour < 14:
-        is_start_time = True
-        return False
-    return True
-
-# 数据记录
-data_log = {'events': []}
-try:
-    with open('data_log.json', 'r') as f:
-        data_log = json.load(f)
-except Exception as e:
-    print(f"Error loading data: {e}")
-
-def update_log(sitting):
-    global is_start_time
-    timestamp = utime.time()  # 记录当前Unix时间戳
+# 有效时段: 工作日 9:00 到 17:30(含 17:30 这一分钟)，中午 12 到 2 点不记录
+ACTIVE_HOURS = {weekday: (('09:00', '17:31'),) for weekday in range(5)}
+BREAKS = (('12:00', '14:00'),)
+HOLIDAYS = ()  # 'YYYY-MM-DD'
+schedule = Schedule(ACTIVE_HOURS, breaks=BREAKS, holidays=HOLIDAYS)
+
+# 数据记录: 追加写入的二进制日志，在后台任务里重放到内存(load_log)，采样不等加载完成
+# 正在进行的事件只在状态切换、每 LOG_FLUSH_S 秒和关机前写回 flash
+LOG_FLUSH_S = 60
+store = EventStore('data_log.bin', legacy_path='data_log.json', flush_interval=LOG_FLUSH_S)
+data_log = {'events': store.events}
+boot_events = None  # 加载时已有的事件数，之后的事件可能是校时前记录的
+# 按日期的汇总索引，网页只需要读索引和当天的事件
+day_index = DayIndex('data_index.json')
+# 明细只保留最近 KEEP_DAYS 天，更早的按天汇总归档，启动时加载的数据量有上限
+KEEP_DAYS = 30
+archive = SummaryArchive('data_summary.bin')
+log_loaded = asyncio.Event()
+# 原始距离记录: 每次采样的距离差分编码后写进 flash 上 64KB 的环形文件，用于调阈值和排查误判
+# 满一块(512 字节)写一次，没写满的块每 RECORD_FLUSH_S 秒写一次；None 表示不记录
+RECORD_FLUSH_S = 300
+recorder = SampleRecorder('samples.bin', capacity=64 * 1024, flush_interval=RECORD_FLUSH_S)
 
+async def load_log():
+    global boot_events, log_version, history_version
+    try:
+        await store.load_async()
+    except Exception as e:
+        print(f"Error loading data: {e}")
+    data_log['events'] = store.events
+    boot_events = len(store.events)
+    day_index.load(store.events)
+    # 加载期间的网页用的是保存的索引，加载后索引可能补上或重建了
+    log_version += 1
+    history_version += 1
+    log_loaded.set()
+    timeline.mark('log loaded')
+
+# 网页缓存的版本号: log_version 在新增事件时加一，history_version 在历史数据被改写(归档、校时)时加一
+log_version = 0
+history_version = 0
+
+def update_log(sitting, timestamp, restart=False):
+    global log_version
     event_type = 'sitting' if sitting else 'standing'
 
-    if is_start_time or data_log['events'][-1]['type'] != event_type: # new event
-        data_log['events'].append({'type': event_type, 'start': timestamp, 'end': timestamp})
-        is_start_time = False
+    if restart or not data_log['events'] or data_log['events'][-1]['type'] != event_type: # new event
+        log_version += 1
+        event = store.append(event_type, timestamp)
+        day_index.add(event, len(data_log['events']) - 1)
+        day_index.save()
         print(f"Logged new {event_type} event from {timestamp}")
-    # 更新正在进行的事件结束时间
-    data_log['events'][-1]['end'] = timestamp
-    # 持久化数据存储
-    with open('data_log.json', 'w') as f:
-        json.dump(data_log, f)
+    else:
+        # 只原地更新正在进行的事件结束时间
+        event = data_log['events'][-1]
+        delta = timestamp - event['end']
+        store.extend(timestamp)
+        day_index.extend(event, delta)
+
+# 待写入的记录: [sitting, 开始时间, 最新时间, 是否新开事件]，同一状态的连续采样合并成一条
+pending_log = []
+log_ready = asyncio.Event()
+
+def queue_log(sitting, timestamp, restart):
+    if pending_log and not restart and pending_log[-1][0] == sitting:
+        pending_log[-1][2] = timestamp
+    else:
+        pending_log.append([sitting, timestamp, timestamp, restart])
+    log_ready.set()
+
+def flush_log():
+    while pending_log:
+        sitting, start, end, restart = pending_log.pop(0)
+        update_log(sitting, start, restart)
+        if end != start:
+            update_log(sitting, end)
+
+def persist():
+    # 睡眠或复位前调用，把内存里的记录全部写回
+    if log_loaded.is_set():
+        flush_log()
+        store.flush()
+    if recorder is not None:
+        recorder.flush(force=True)
+
+async def writer():
+    # 日志加载完之前的采样先留在队列里
+    await log_loaded.wait()
+    while True:
+        try:
+            await asyncio.wait_for(log_ready.wait(), LOG_FLUSH_S)
+        except asyncio.TimeoutError:
+            # 一段时间没有新采样(例如离开了有效时段)，把攒着的结束时间写回
+            store.flush()
+            if recorder is not None:
+                recorder.flush(force=True)
+            continue
+        log_ready.clear()
+        try:
+            flush_log()
+            if recorder is not None:
+                recorder.flush()
+        except Exception as e:
+            print(f"Error saving data: {e}")
 
 # 定时器和状态检查
 sitting = False
 start_time = 0
+# 滤波 + 滞回(180/220mm) + 至少保持 6 秒，单个噪声样本不会切换状态
+detector = PresenceDetector(enter_mm=180, exit_mm=220, window=5, dwell_ms=6000)
+# 状态稳定时放慢采样，切换检测的最坏延迟不超过 MAX_DETECT_LATENCY_MS
+MAX_DETECT_LATENCY_MS = 45000
+ALERT_MINUTES = (15, 20, 30, 40)  # 与 set_sitting_alert_color 的阈值一致
+sampler = AdaptiveSampler(base_ms=SAMPLE_PERIOD_MS,
+                          max_latency_ms=MAX_DETECT_LATENCY_MS if power.options['adaptive_sampling'] else None,
+                          confirm_ms=detector.confirm_ms(SAMPLE_PERIOD_MS),
+                          thresholds_ms=[m * 60000 for m in ALERT_MINUTES])
 
+# 换颜色时渐变过去；每次采样都会调用，颜色没变时不会重新开始动画，也不会写 LED
+# 灯条按到最后一个提醒阈值的进度点亮，颜色与单个 LED 相同
 def set_sitting_alert_color(sitting_time):
     if sitting_time > 40:  # 40分钟
         np.start_blinking('red', 1, brightness=1)
+        return
     elif sitting_time > 30: 
-        np.set_color("red", brightness=0.8)
+        color, brightness = "red", 0.8
     elif sitting_time > 20: 
-        np.set_color("blue", brightness=0.5)
+        color, brightness = "blue", 0.5
     elif sitting_time > 15: 
-        np.set_color("cyan", brightness=0.5)
+        color, brightness = "cyan", 0.5
     else: 
-        np.set_color("green", brightness=sitting_time/15.)
+        color, brightness = "green", sitting_time/15.
+    if np.n > 1:
+        np.progress(sitting_time / ALERT_MINUTES[-1], color, max(brightness, 0.5))
+    elif color == "green":
+        np.set_color(color, brightness)
+    else:
+        np.fade_to(color, brightness)
+
+def in_active_hours(now):
+    # 校时前不知道现在几点，先按有效时段处理，校时后再按日程判断
+    return schedule.active(now) if time_valid else True
 
-def check_sitting(_):
-    global start_time, sitting
-    if not is_within_active_hours(utime.localtime(utime.time())):
+def check_sitting():
+    global start_time, sitting, is_start_time
+    if not in_active_hours(utime.time()):
         return
-    distance = sensor.read()
+    # 断电重新初始化后传感器对象会换掉，每次从 SensorManager 取
+    if sensors.pins['chair'] is not None:
+        # 中断模式: 数据就绪中断已经把结果读进缓冲区，cycle() 取各传感器最新的值，不等待测距
+        distance = sensors.cycle()['chair']
+        if distance is None:
+            return
+    else:
+        distance = sensors.get('chair').read()
     print(f'Current distance: {distance} mm')
-    if distance > 200 and sitting:
+    timeline.mark('first sample')
+    now_ms = utime.ticks_ms()
+    if recorder is not None and recorder.add(distance, utime.time(), now_ms):
+        log_ready.set()  # 写满了一块，由写入任务落盘
+    present = detector.update(distance, now_ms)
+    if not detector.ready:
+        return  # 滤波窗口还没填满，按 BOOT_SAMPLE_MS 继续快速采样
+    timeline.mark('first decision')
+    if not present and sitting:
         sitting = False
         start_time = 0
         np.stop_blinking()
         np.clear()
         print(f"Transition to standing at {utime.time()}")
-    elif distance < 200 and not sitting: # start sitting
+    elif present and not sitting: # start sitting
         sitting = True
         start_time = utime.ticks_ms()
         print(f"Transition to sitting at {utime.time()}")
-    elif distance < 200 and sitting:
+    elif present and sitting:
         sitting_time = utime.ticks_diff(utime.ticks_ms(), start_time) / 1000 / 60 # minutes
         set_sitting_alert_color(sitting_time)
-    update_log(sitting)
-    
+    queue_log(sitting, utime.time(), is_start_time)
+    is_start_time = False
+    # 读数明确支持当前状态时才放慢；落在滞回区间内也按可能切换处理
+    consistent = distance < detector.enter_mm if present else distance > detector.exit_mm
+    sitting_ms = utime.ticks_diff(now_ms, start_time) if sitting else None
+    set_sample_period(sampler.next_period(present, consistent, now_ms, sitting_ms))
 
 
+# 定时器回调只唤醒采样任务；INSTRUMENT 打开时统计回调耗时和丢失的 tick
+# 启动后按 BOOT_SAMPLE_MS 采样直到第一次得出结论，之后由 sampler 决定周期
+# chair 接了 GPIO1 中断引脚时不用定时器: 传感器按采样周期定时连续测距(SensorManager.start)，数据就绪中断唤醒采样任务
+BOOT_SAMPLE_MS = 100
+INSTRUMENT = False
+ticker = Ticker(instrument=INSTRUMENT)
 timer = Timer(2)
-timer.init(period=2000, mode=Timer.PERIODIC, callback=check_sitting)
-
-# 网页显示
-def format_datetime(t):
-    # t is a tuple: (year, month, day, hour, minute, second)
-    return f"{t[0]:04d}-{t[1]:02d}-{t[2]:02d} {t[3]:02d}:{t[4]:02d}:{t[5]:02d}"
-
-def filter_events_by_date(data, target_date):
-    filtered_events = []
-    total_sitting, total_standing = 0, 0
-    for event in data['events']:
-        start_time = utime.localtime(event['start'])
-        if start_time[:3] == target_date:
-            if event['type'] == 'sitting':
-                total_sitting += event['end'] - event['start']
-            else:
-                total_standing += event['end'] - event['start']
-            filtered_events.append(event)
-    return filtered_events, total_sitting, total_standing
-
-def aggregate_data_by_day(data):
-    daily_summary = {}
-    for event in data['events']:
-        start_time = utime.localtime(event['start'])
-        event_date = start_time[:3]  # 取出年、月、日形成日期
-        formatted_date = "{:04d}-{:02d}-{:02d}".format(*event_date)  # 格式化日期
-
-        # 初始化日期键的站立和坐立时间
-        if formatted_date not in daily_summary:
-            daily_summary[formatted_date] = {'sitting': 0, 'standing': 0}
-
-        # 根据事件类型增加对应的时间
-        event_duration = event['end'] - event['start']
-        if event['type'] == 'sitting':
-            daily_summary[formatted_date]['sitting'] += event_duration
+sample_period = 0
+
+def set_sample_period(period):
+    global sample_period
+    if period != sample_period:
+        sample_period = period
+        if sensors.pins['chair'] is not None:
+            # 所有传感器一起按新的周期重新开始连续测距，chair 的中断唤醒采样任务
+            sensors.stop()
+            sensors.start(period, {'chair': ticker.irq})
         else:
-            daily_summary[formatted_date]['standing'] += event_duration
-
-    return daily_summary
-
-def generate_event_html(filtered_events):
-    events_html = ""
-    for event in filtered_events:
-        start_time = utime.localtime(event['start'])
-        end_time = utime.localtime(event['end'])
-        duration = event['end'] - event['start']
-        stime = format_datetime(start_time)
-        etime = format_datetime(end_time)
-        events_html += f"<tr><td>{event['type']}</td><td>{stime}</td><td>{etime}</td><td>{int(duration / 6)/10}min</td></tr>"
-    return events_html
-
-def generate_summary_html(daily_summary):
-    summary_html = "<table><tr><th>Date</th><th>Total Sitting Time</th><th>Total Standing Time</th></tr>"
-    for date, times in daily_summary.items():
-        summary_html += f"<tr><td>{date}</td><td>{int(times['sitting'] / 3600)}h {int(times['sitting'] % 3600 / 60)}min</td><td>{int(times['standing'] / 3600)}h {int(times['standing'] % 3600 / 60)}min</td></tr>"
-    summary_html += "</table>"
-    return summary_html
-
-def web_page():
-    current_date = utime.localtime()[:3]  # (year, month, day)
-    data = data_log
-    try:
-        filtered_events, total_sitting, total_standing = filter_events_by_date(data, current_date)
-        events_html = generate_event_html(filtered_events)
-        daily_summary = aggregate_data_by_day(data)
-        summary_html = generate_summary_html(daily_summary)
-        formatted_current_time = format_datetime(utime.localtime())
-        status = "Sitting" if sitting else "Standing"
-        html = f"""<html><head><title>ESP32 Sit Stand Alert</title>
-                   <style>
-                       table, th, td {{border: 1px solid black; border-collapse: collapse;}}
-                       th, td {{padding: 8px; text-align: left;}}
-                   </style>
-                   </head>
-                   <body>
-                   <h1>Status: {status}</h1>
-                   <p>Current Time: {formatted_current_time}</p>
-                   <h2>Daily Summary</h2>
-                   {summary_html}
-                   <h2>Details for Today</h2>
-                   <p>Total Sitting Time Today: {int(total_sitting / 3600)} hours, {int(total_sitting % 3600 / 60)} minutes</p>
-                   <p>Total Standing Time Today: {int(total_standing / 3600)} hours, {int(total_standing % 3600 / 60)} minutes</p>
-                   <table>
-                       <tr><th>Type</th><th>Start Time</th><th>End Time</th><th>Duration</th></tr>
-                       {events_html}
-                   </table>
-                   </body></html>"""
-        return html
-    except Exception as e:
-        print(f"Error generating web page: {e}")
-        return f"<html><body><h1>Error in generating data</h1><p>{e}<p></body></html>"
-    
-s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-s.bind(('', 80))
-s.listen(5)
-
-led.on() # initialize finished
-while True:
+            timer.init(period=period, mode=Timer.PERIODIC, callback=ticker.irq)
+
+# 只在有效时段内运行采样定时器；另一个单次定时器在下一次切换时刻唤醒，最长一小时复查一次
+SCHEDULE_RECHECK_S = 3600
+sampling = None
+schedule_ticker = Ticker()
+schedule_timer = Timer(3)
+
+SENSOR_RETRY_S = 5  # 传感器恢复失败后多久重试
+
+def apply_schedule():
+    global sampling, sample_period, is_start_time
+    now = utime.time()
+    retry = False
+    if in_active_hours(now):
+        if not sampling:
+            try:
+                power.resume()
+            except OSError as e:
+                print(f"Error resuming sensors: {e}")
+                retry = True
+            else:
+                sampling = True
+                sampler.reset()
+                set_sample_period(SAMPLE_PERIOD_MS if detector.ready else BOOT_SAMPLE_MS)
+                print(f"Active hours start at {now}")
+    elif sampling is not False:
+        sampling = False
+        timer.deinit()
+        sensors.stop()
+        sample_period = 0
+        # 浅睡眠期间可能掉电，先把脏的日志和没写满的采样块写回
+        try:
+            persist()
+        except OSError as e:
+            print(f"Error saving data: {e}")
+        power.suspend(schedule.next_transition(now))
+        is_start_time = True  # 下一个时段开始时另起一条事件
+        print(f"Active hours end at {now}")
+    wait = min(schedule.next_transition(now) - now, SCHEDULE_RECHECK_S) if time_valid else SCHEDULE_RECHECK_S
+    if retry:
+        wait = min(wait, SENSOR_RETRY_S)
+    schedule_timer.init(period=max(wait, 1) * 1000, mode=Timer.ONE_SHOT, callback=schedule_ticker.irq)
+
+apply_schedule()
+
+def on_wifi_connected():
+    timeline.mark('wifi connected')
+    power.apply_wifi()
+
+def on_time_synced(delta):
+    global time_valid, log_version, history_version
+    timeline.mark('time synced')
+    if not time_valid:
+        # 第一次校时: 之前记录的事件用的是未校准的 RTC，按 RTC 的调整量整体平移
+        for entry in pending_log:
+            entry[1] += delta
+            entry[2] += delta
+        events = data_log['events']
+        if boot_events is not None and boot_events < len(events):
+            day_index.forget(events, boot_events)
+            store.restamp(boot_events, delta)
+            day_index.rebuild(events, boot_events)
+            day_index.save()
+            log_version += 1
+            history_version += 1
+            print(f"Restamped {len(events) - boot_events} events by {delta} s")
+        time_valid = True
+    schedule_ticker.irq(None)  # 按校准后的时间重新判断有效时段
+
+connectivity = Connectivity(wlan, WIFI_SSID, WIFI_PASSWORD, NTP_SERVERS, tz_offset_s=TIME_ZONE_OFFSET,
+                            on_connect=on_wifi_connected, on_sync=on_time_synced)
+
+# 网页服务: asyncio 服务器，每个连接独立任务，带超时和并发上限；在日志加载之前启动
+HTTP_HOST = '0.0.0.0'
+HTTP_PORT = 80
+# 首页的实时部分最多缓存 LIVE_REFRESH_S 秒(当前时间和进行中事件的时长)，新事件和状态切换立即失效
+LIVE_REFRESH_S = 30
+server = None
+page_cache = None
+
+async def start_web():
+    global server, page_cache
+    from http_server import HTTPServer
+    from page_cache import PageCache
+    import pages
+    import api
+    import export
+
+    page_cache = PageCache()
+
+    def status_page(request):
+        now = utime.time()
+        live = f'{log_version}-{int(sitting)}-{now // LIVE_REFRESH_S}'
+        history = f'{date_key(now)}-{history_version}'
+        # 日志加载完之前内存里还没有事件，当天的明细直接从日志文件读
+        events = data_log['events'] if log_loaded.is_set() else None
+        return pages.status_page(request, page_cache, events, day_index, sitting, archive, live, history, store)
+
+    def loaded(handler):
+        # 需要内存里全部事件的接口在日志加载完之前回 503，客户端稍后重试
+        def route(request):
+            if not log_loaded.is_set():
+                return '503 Service Unavailable', 'text/plain', ('Log loading',), (('Retry-After', '1'),)
+            return handler(request)
+        return route
+
+    server = HTTPServer(port=HTTP_PORT, host=HTTP_HOST, max_clients=4)
+    server.route('/', status_page)
+    # JSON 接口，只读取请求的范围
+    server.route('/api/events', loaded(lambda request: api.events(request, data_log['events'])))
+    server.route('/api/summary', lambda request: api.summary(request, day_index, archive))
+    server.route('/api/status', loaded(lambda request: api.status(request, data_log['events'], day_index, sitting,
+                                                                     ticker if INSTRUMENT else None)))
+    # 导出明细，直接从日志文件流式读取
+    server.route('/export.csv', lambda request: export.csv(request, store))
+    server.route('/export.ndjson', lambda request: export.ndjson(request, store))
+    if recorder is not None:
+        server.route('/export/samples.csv', lambda request: export.samples(request, recorder))
+    await server.start()
+    timeline.mark('http server')
+
+async def housekeeping():
+    # 每小时检查一次是否需要归档和压缩日志
+    global history_version
+    from retention import Retention
+    retention = Retention(store, day_index, archive, keep_days=KEEP_DAYS)
+    while True:
+        try:
+            if time_valid and retention.due(utime.time()):
+                archived = await retention.compact(utime.time())
+                data_log['events'] = store.events  # 压缩后日志换成了新的列表
+                history_version += 1
+                print(f"Archived {archived} events older than {retention.keep_days} days")
+        except Exception as e:
+            print(f"Error compacting log: {e}")
+        await asyncio.sleep(3600)
+
+async def serve(http=True):
+    # 分阶段启动: 传感器已经初始化、采样定时器已经在跑；联网校时在后台进行，
+    # 然后启动网页服务，再加载日志。采样和写入各自一个任务，网页请求在两次采样之间处理
+    asyncio.create_task(connectivity.run())
+    asyncio.create_task(ticker.run(check_sitting))
+    asyncio.create_task(schedule_ticker.run(apply_schedule))
+    asyncio.create_task(power.sleeper(lambda: server is not None and server.active > 0,
+                                      lambda: schedule_ticker.irq(None)))
+    asyncio.create_task(writer())
+    asyncio.create_task(leds.run())
+    if http:
+        # 首页先用保存的索引和归档，当天的明细按需从日志文件读，不等日志重放
+        day_index.read()
+        await start_web()
+    await load_log()
+    led.on() # initialize finished
+    await housekeeping()
+
+if __name__ == '__main__':
     try:
-        conn, addr = s.accept()
-        request = conn.recv(1024)
-        conn.send('HTTP/1.1 200 OK\n')
-        conn.send('Content-Type: text/html\n')
-        conn.send('Connection: close\n\n')
-        conn.sendall(web_page())
-        conn.close()
-    except Exception as e:
-        print(f"Error handling request: {e}")
\ No newline at end of file
+        asyncio.run(serve())
+    finally:
+        persist()
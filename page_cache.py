@@ -0,0 +1,64 @@
+# 渲染结果缓存: 每个片段按 ETag 缓存，ETag 由调用方根据日志版本号生成，不用比较内容
+# 浏览器带着 If-None-Match 轮询时直接回 304，不渲染也不发送页面
+
+
+def etag_matches(request, etag):
+    # If-None-Match 可以是逗号分隔的多个 ETag、弱 ETag(W/"...") 或 *
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag or tag == '*':
+            return True
+    return False
+
+
+class PageCache:
+    # max_bytes: 单个片段超过这个大小就不缓存，每次流式渲染；缓存占用的内存与历史长度无关
+    def __init__(self, max_bytes=4096):
+        self.max_bytes = max_bytes
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def check(self, request, etag):
+        if etag_matches(request, etag):
+            self.not_modified += 1
+            return True
+        return False
+
+    def fragment(self, key, tag, render):
+        # 返回片段的文本块；tag 变了才调用 render() 重新渲染
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == tag:
+            self.hits += 1
+            return (entry[1],)
+        self.misses += 1
+        self.entries.pop(key, None)
+        return self._collect(key, tag, render())
+
+    def _collect(self, key, tag, chunks):
+        # 边发送边收集，完整发送完才存入缓存
+        parts = []
+        size = 0
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size > self.max_bytes:
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+        if parts is not None:
+            try:
+                self.entries[key] = (tag, ''.join(parts))
+            except MemoryError:
+                pass  # 堆里放不下就不缓存，页面已经发送完
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'not_modified': self.not_modified,
+                'bytes': sum(len(entry[1]) for entry in self.entries.values())}
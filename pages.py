@@ -0,0 +1,121 @@
+try:
+    import utime
+except ImportError:
+    import time as utime
+from day_index import date_key
+
+
+def format_datetime(t):
+    # t is a tuple: (year, month, day, hour, minute, second)
+    return f"{t[0]:04d}-{t[1]:02d}-{t[2]:02d} {t[3]:02d}:{t[4]:02d}:{t[5]:02d}"
+
+def event_row(event):
+    start_time = utime.localtime(event['start'])
+    end_time = utime.localtime(event['end'])
+    duration = event['end'] - event['start']
+    stime = format_datetime(start_time)
+    etime = format_datetime(end_time)
+    return f"<tr><td>{event['type']}</td><td>{stime}</td><td>{etime}</td><td>{int(duration / 6)/10}min</td></tr>"
+
+def summary_row(date, sitting, standing):
+    return f"<tr><td>{date}</td><td>{int(sitting / 3600)}h {int(sitting % 3600 / 60)}min</td><td>{int(standing / 3600)}h {int(standing % 3600 / 60)}min</td></tr>"
+
+_PAGE_HEAD = """<html><head><title>ESP32 Sit Stand Alert</title>
+<style>
+table, th, td {border: 1px solid black; border-collapse: collapse;}
+th, td {padding: 8px; text-align: left;}
+</style>
+</head>
+<body>
+"""
+_SUMMARY_HEAD = "<table><tr><th>Date</th><th>Total Sitting Time</th><th>Total Standing Time</th></tr>"
+_EVENTS_HEAD = "<table>\n<tr><th>Type</th><th>Start Time</th><th>End Time</th><th>Duration</th></tr>\n"
+
+def render_status(sitting):
+    # 页面开头: 当前状态和时间
+    yield f"<h1>Status: {'Sitting' if sitting else 'Standing'}</h1>\n"
+    yield f"<p>Current Time: {format_datetime(utime.localtime())}</p>\n"
+
+def render_archive(archive=None):
+    # 汇总表开头和归档的旧日期: 随历史增长，不缓存，每次从文件逐批读出，内存只占一批
+    try:
+        yield "<h2>Daily Summary</h2>\n"
+        yield _SUMMARY_HEAD
+        if archive is not None:
+            for row in archive.rows():
+                yield summary_row(*row)
+    except Exception as e:
+        print(f"Error generating web page: {e}")
+        yield f"<h1>Error in generating data</h1><p>{e}<p>"
+
+def render_summary(index, archive=None):
+    # 索引里今天之前的近期日期(最多 KEEP_DAYS 天，大小有上限)，只在跨天、归档和校时后变化
+    # 今天那一行和表尾在 render_today()
+    try:
+        today = date_key(utime.time())
+        archived = archive.last if archive is not None else None
+        for key in sorted(index.days):
+            if (archived is None or key > archived) and key < today:
+                yield summary_row(key, *index.totals(key))
+    except Exception as e:
+        print(f"Error generating web page: {e}")
+        yield f"<h1>Error in generating data</h1><p>{e}<p>"
+
+def render_today(events, index, store=None):
+    # 随采样变化的部分: 汇总表里今天那一行，以及当天的明细
+    # events 为 None 时日志还没加载进内存，当天的明细从 store 的日志文件按时间读
+    # 当天第一条事件的下标在调用时就取好: 压缩会换掉事件列表并平移索引，生成器开始时再查会和旧列表对不上
+    now = utime.time()
+    today = date_key(now)
+    offset = index.first_offset(today) if events is not None else None
+    return _render_today(events, index, store, now, today, offset)
+
+def _render_today(events, index, store, now, today, offset):
+    try:
+        if today in index.days:
+            yield summary_row(today, *index.totals(today))
+        yield "</table>\n<h2>Details for Today</h2>\n"
+        total_sitting, total_standing = index.totals(today)
+        yield f"<p>Total Sitting Time Today: {int(total_sitting / 3600)} hours, {int(total_sitting % 3600 / 60)} minutes</p>\n"
+        yield f"<p>Total Standing Time Today: {int(total_standing / 3600)} hours, {int(total_standing % 3600 / 60)} minutes</p>\n"
+        yield _EVENTS_HEAD
+        if events is None:
+            t = utime.localtime(now)
+            midnight = now - (t[3] * 3600 + t[4] * 60 + t[5])
+            for type_name, begin, end in store.scan(midnight, midnight + 86400):
+                yield event_row({'type': type_name, 'start': begin, 'end': end})
+        else:
+            # 当天事件是日志的尾部，从索引记录的下标开始，不复制列表
+            if offset is not None:
+                for i in range(offset, len(events)):
+                    yield event_row(events[i])
+        yield "</table>\n"
+    except Exception as e:
+        print(f"Error generating web page: {e}")
+        yield f"<h1>Error in generating data</h1><p>{e}<p>"
+
+def page(*parts):
+    yield _PAGE_HEAD
+    for part in parts:
+        for chunk in part:
+            yield chunk
+    yield "</body></html>"
+
+def render_page(events, index, sitting, archive=None):
+    # 逐块生成页面，内存占用与事件数量无关
+    return page(render_status(sitting), render_archive(archive), render_summary(index, archive),
+                render_today(events, index))
+
+def status_page(request, cache, events, index, sitting, archive, live, history, store=None):
+    # live/history: 实时部分和历史汇总的版本标记，由调用方按日志版本号生成；events/store 见 render_today()
+    # 页面与 render_page() 相同；归档部分随历史增长，每次从文件流式读出，其余片段按版本分别缓存
+    # 浏览器带着相同的 ETag 轮询时回 304，不读归档
+    etag = f'"{live}.{history}"'
+    headers = (('ETag', etag), ('Cache-Control', 'no-cache'))
+    if cache.check(request, etag):
+        return '304 Not Modified', 'text/html', (), headers
+    chunks = page(cache.fragment('status', live, lambda: render_status(sitting)),
+                  render_archive(archive),
+                  cache.fragment('summary', history, lambda: render_summary(index, archive)),
+                  cache.fragment('today', live, lambda: render_today(events, index, store)))
+    return '200 OK', 'text/html', chunks, headers
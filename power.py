@@ -0,0 +1,77 @@
+# 电源策略: 有效时段外停掉传感器、状态稳定时降低采样率、Wi-Fi 省电和时段外浅睡眠
+import asyncio
+import machine
+import utime
+
+POLICIES = {
+    # 原来的行为: 传感器保持原状，固定采样率，Wi-Fi 一直接收
+    'performance': {'sensor_off': False, 'adaptive_sampling': False, 'wifi_powersave': False, 'light_sleep': False},
+    # 时段外停止测距(有 XSHUT 的断电)，状态稳定时放慢采样(见 sampling.py)，Wi-Fi modem sleep
+    'balanced': {'sensor_off': True, 'adaptive_sampling': True, 'wifi_powersave': True, 'light_sleep': False},
+    # 在 balanced 基础上，时段外按片浅睡眠，片与片之间处理网页请求
+    'low_power': {'sensor_off': True, 'adaptive_sampling': True, 'wifi_powersave': True, 'light_sleep': True},
+}
+
+
+class PowerManager:
+    def __init__(self, sensors, wlan=None, policy='balanced', sleep_slice_ms=1000):
+        if policy not in POLICIES:
+            raise ValueError('unknown power policy: ' + policy)
+        self.sensors = sensors
+        self.wlan = wlan
+        self.policy = policy
+        self.options = POLICIES[policy]
+        self.sleep_slice_ms = sleep_slice_ms
+        self.sensing = True
+        self.sleep_until = 0
+        self._suspended = asyncio.Event()
+        self.slept_ms = 0
+
+    def apply_wifi(self):
+        # 连上网之后调用；modem sleep 下仍保持关联，AP 会缓存发给设备的数据包
+        if self.wlan is None or not self.options['wifi_powersave']:
+            return
+        try:
+            self.wlan.config(pm=self.wlan.PM_POWERSAVE)
+        except (AttributeError, ValueError, OSError):
+            pass  # 旧固件不支持 pm 参数
+
+    def suspend(self, until):
+        # 有效时段结束，until 是下一个时段开始的时间
+        self.sensing = False
+        if self.options['sensor_off']:
+            self.sensors.stop()
+            for name in self.sensors.xshut:
+                self.sensors.power_down(name)
+        if self.options['light_sleep']:
+            self.sleep_until = until
+            self._suspended.set()
+
+    def resume(self):
+        # 有效时段开始；断过电的传感器需要重新初始化，失败时抛出 OSError，保持未恢复状态以便重试
+        if self.sensing:
+            return
+        if self.options['sensor_off'] and self.sensors.xshut:
+            self.sensors.restore()
+        self.sensing = True
+        self.sleep_until = 0
+
+    async def sleeper(self, busy, wake):
+        # 浅睡眠时定时器暂停而 RTC 继续走，所以按 RTC 判断是否到了下一个时段，到了就调用 wake()
+        while True:
+            if not self.sleep_until:
+                self._suspended.clear()
+                await self._suspended.wait()
+                continue
+            remaining = self.sleep_until - utime.time()
+            if remaining <= 0:
+                self.sleep_until = 0
+                wake()
+            elif busy():
+                await asyncio.sleep(0.01)
+                continue
+            else:
+                ms = min(self.sleep_slice_ms, remaining * 1000)
+                machine.lightsleep(ms)
+                self.slept_ms += ms
+            await asyncio.sleep(0)
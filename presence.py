@@ -0,0 +1,92 @@
+from array import array
+try:
+    from utime import ticks_diff
+except ImportError:
+    def ticks_diff(a, b):
+        return a - b
+
+
+class PresenceDetector:
+    # 距离 -> 是否有人: 中值滤波 + 整数 EMA，进入/离开两个阈值做滞回，状态需保持 dwell_ms 才切换
+    # 所有缓冲区预先分配，每次 update 不产生新的列表
+    def __init__(self, enter_mm=180, exit_mm=220, window=5, ema_shift=1, dwell_ms=6000):
+        if enter_mm > exit_mm:
+            raise ValueError('enter_mm must not exceed exit_mm')
+        self.enter_mm = enter_mm
+        self.exit_mm = exit_mm
+        self.ema_shift = ema_shift
+        self.dwell_ms = dwell_ms
+        self._ring = array('H', [0] * window)
+        self._sorted = array('H', [0] * window)
+        self._head = 0
+        self._count = 0
+        self.filtered = None
+        self.present = False
+        self.ready = False  # 窗口第一次填满之前 present 只是默认值
+        self._candidate = False
+        self._since = None
+        self.transitions = 0
+
+    def _median(self):
+        n = self._count
+        s = self._sorted
+        for i in range(n):
+            s[i] = self._ring[i]
+        # 插入排序，窗口很小
+        for i in range(1, n):
+            v = s[i]
+            j = i - 1
+            while j >= 0 and s[j] > v:
+                s[j + 1] = s[j]
+                j -= 1
+            s[j + 1] = v
+        return s[n // 2]
+
+    def confirm_ms(self, period_ms):
+        # 按 period_ms 采样时，从第一个变化的读数到状态切换的最坏时间:
+        # 中值过半 + EMA 收敛(按 800mm 到 150mm 的阶跃估算) + dwell，dwell 向上取整到采样周期
+        median = len(self._ring) // 2
+        ema = (5 << (self.ema_shift - 1)) if self.ema_shift else 0
+        return (median + ema + 1) * period_ms + self.dwell_ms
+
+    def update(self, distance, now_ms):
+        ring = self._ring
+        ring[self._head] = min(distance, 0xffff)
+        self._head = (self._head + 1) % len(ring)
+        if self._count < len(ring):
+            self._count += 1
+        median = self._median()
+        if self.filtered is None:
+            self.filtered = median
+        else:
+            self.filtered += (median - self.filtered) >> self.ema_shift
+
+        if not self.ready:
+            # 启动时没有之前的状态需要防抖，窗口填满后直接按滤波结果决定
+            if self._count < len(ring):
+                return self.present
+            self.ready = True
+            self.present = self.filtered < self.enter_mm
+            return self.present
+        if self.present:
+            candidate = self.filtered <= self.exit_mm
+        else:
+            candidate = self.filtered < self.enter_mm
+        if candidate == self.present:
+            self._since = None
+        elif self._since is None or candidate != self._candidate:
+            self._candidate = candidate
+            self._since = now_ms
+        if self._since is not None and ticks_diff(now_ms, self._since) >= self.dwell_ms:
+            self.present = candidate
+            self._since = None
+            self.transitions += 1
+        return self.present
+
+    def reset(self):
+        self._count = 0
+        self._head = 0
+        self.filtered = None
+        self.present = False
+        self.ready = False
+        self._since = None
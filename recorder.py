@@ -0,0 +1,215 @@
+# 原始距离记录: 每次采样的 (时间, 距离) 按差分 + varint 编码，采样周期不变时一次采样约 2 字节
+# 在内存里攒满一块再写入 flash 上固定大小的环形文件，写满后覆盖最旧的块
+# 块格式: 头 <BIIH 标记、序号、第一条样本的时间(秒)、样本数；之后每条样本是
+# varint(zigzag(采样间隔的变化毫秒数)) + varint(zigzag(距离差))，块内第一条的间隔和距离都相对 0
+# RTC 只有秒，块内的时间是毫秒精度，块的起点精确到秒
+import struct
+import utime
+
+BLOCK_SIZE = 512
+_HEADER_FMT = '<BIIH'
+_HEADER_SIZE = struct.calcsize(_HEADER_FMT)
+_MAGIC = 0xA5
+_MAX_SAMPLE = 10  # 两个 varint 的最大长度
+_MAX_DRIFT_S = 2  # 按毫秒累计的时间与 RTC 相差超过这个值(校时、长时间停采)就另起一块
+
+
+def _put_varint(buf, pos, value):
+    while value >= 0x80:
+        buf[pos] = (value & 0x7f) | 0x80
+        value >>= 7
+        pos += 1
+    buf[pos] = value
+    return pos + 1
+
+
+def _get_varint(buf, pos):
+    value = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        value |= (b & 0x7f) << shift
+        if b < 0x80:
+            return value, pos
+        shift += 7
+
+
+def decode_block(buf):
+    # 返回 (序号, 开始时间, [(距开始的毫秒数, 距离), ...])；不是有效块时返回 None
+    magic, seq, start, count = struct.unpack_from(_HEADER_FMT, buf, 0)
+    if magic != _MAGIC:
+        return None
+    samples = []
+    pos = _HEADER_SIZE
+    t_ms = 0
+    dt = 0
+    distance = 0
+    for _ in range(count):
+        ddt, pos = _get_varint(buf, pos)
+        dd, pos = _get_varint(buf, pos)
+        dt += (ddt >> 1) ^ -(ddt & 1)
+        t_ms += dt
+        distance += (dd >> 1) ^ -(dd & 1)
+        samples.append((t_ms, distance))
+    return seq, start, samples
+
+
+class SampleRecorder:
+    # capacity: 环形文件的大小；flush_interval: 没写满的块最多在内存里攒多少秒，断电最多丢这么久
+    def __init__(self, path='samples.bin', capacity=64 * 1024, flush_interval=300):
+        self.path = path
+        self.blocks = capacity // BLOCK_SIZE
+        self.flush_interval = flush_interval
+        self.buf = bytearray(BLOCK_SIZE)
+        self._sealed = bytearray(BLOCK_SIZE)
+        self._sealed_pending = False
+        self._sealed_seq = 0
+        self._sealed_pos = 0
+        self.seq = None  # 当前块的序号，第一次写入前从文件里找
+        self.pos = 0
+        self.count = 0
+        self._start = 0
+        self._offset_ms = 0
+        self._last_ms = 0
+        self._last_dt = 0
+        self._last_distance = 0
+        self._flushed_count = 0
+        self._flushed_at = 0
+        self.samples = 0
+        self.bytes_encoded = 0
+        self.bytes_written = 0
+        self.writes = 0
+
+    def _scan(self):
+        # 读各块的头，返回 [(序号, 块号), ...]
+        found = []
+        header = bytearray(_HEADER_SIZE)
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            open(self.path, 'wb').close()
+            return found
+        with f:
+            for slot in range(self.blocks):
+                f.seek(slot * BLOCK_SIZE)
+                if f.readinto(header) != _HEADER_SIZE:
+                    break
+                magic, seq, _, _ = struct.unpack_from(_HEADER_FMT, header, 0)
+                if magic == _MAGIC:
+                    found.append((seq, slot))
+        return found
+
+    def _next_seq(self):
+        if self.seq is None:
+            found = self._scan()
+            self.seq = max(found)[0] + 1 if found else 0
+        else:
+            self.seq += 1
+        return self.seq
+
+    def add(self, distance, now, now_ms):
+        # 每次采样调用一次，只写内存；有块写满时返回 True，由调用方安排 flush()
+        sealed = False
+        if self.count:
+            dt = utime.ticks_diff(now_ms, self._last_ms)
+            drift = now - self._start - (self._offset_ms + dt) // 1000
+            if self.pos + _MAX_SAMPLE > BLOCK_SIZE or dt < 0 or drift > _MAX_DRIFT_S or drift < -_MAX_DRIFT_S:
+                self._seal()
+                sealed = True
+        if not self.count:
+            self._start = now
+            self._offset_ms = 0
+            self._last_dt = 0
+            self._last_distance = 0
+            self.pos = _HEADER_SIZE
+            dt = 0
+        ddt = dt - self._last_dt
+        dd = distance - self._last_distance
+        pos = _put_varint(self.buf, self.pos, ddt << 1 if ddt >= 0 else (-ddt << 1) - 1)
+        pos = _put_varint(self.buf, pos, dd << 1 if dd >= 0 else (-dd << 1) - 1)
+        self.bytes_encoded += pos - self.pos
+        self.pos = pos
+        self.count += 1
+        self.samples += 1
+        self._offset_ms += dt
+        self._last_ms = now_ms
+        self._last_dt = dt
+        self._last_distance = distance
+        return sealed
+
+    def _seal(self):
+        # 当前块写满: 换到第二个缓冲区等待写入；上一块还没写的话先同步写掉
+        if self.seq is None:
+            self._next_seq()
+        if self._sealed_pending:
+            self._write_sealed()
+        if self._flushed_count == self.count:
+            # 整块已经写过了(最后一次 flush 之后没有新样本)
+            self._sealed_pending = False
+        else:
+            self._header(self.buf)
+            self.buf, self._sealed = self._sealed, self.buf
+            self._sealed_pos = self.pos
+            self._sealed_seq = self.seq
+            self._sealed_pending = True
+        self._next_seq()
+        self.count = 0
+        self._flushed_count = 0
+
+    def _header(self, buf):
+        struct.pack_into(_HEADER_FMT, buf, 0, _MAGIC, self.seq, self._start, self.count)
+
+    def _write(self, seq, buf, size):
+        with open(self.path, 'r+b') as f:
+            f.seek(seq % self.blocks * BLOCK_SIZE)
+            f.write(memoryview(buf)[:size])
+        self.bytes_written += size
+        self.writes += 1
+
+    def _write_sealed(self):
+        self._write(self._sealed_seq, self._sealed, self._sealed_pos)
+        self._sealed_pending = False
+
+    def flush(self, force=False):
+        # 写掉写满的块；没写满的块超过 flush_interval 秒或 force 时也写一次
+        if self.seq is None:
+            self._next_seq()
+        if self._sealed_pending:
+            self._write_sealed()
+        now = utime.time()
+        if self.count > self._flushed_count and (force or now - self._flushed_at >= self.flush_interval):
+            self._header(self.buf)
+            self._write(self.seq, self.buf, self.pos)
+            self._flushed_count = self.count
+            self._flushed_at = now
+
+    def read(self, start=0, stop=None):
+        # 按时间顺序逐块读出 (时间毫秒, 距离)，时间是 epoch 毫秒；当前块从内存读
+        self.flush()
+        buf = bytearray(BLOCK_SIZE)
+        with open(self.path, 'rb') as f:
+            for seq, slot in sorted(self._scan()):
+                if seq == self.seq:
+                    continue
+                f.seek(slot * BLOCK_SIZE)
+                f.readinto(buf)
+                for sample in self._samples(buf, start, stop):
+                    yield sample
+        if self.count:
+            self._header(self.buf)
+            for sample in self._samples(self.buf, start, stop):
+                yield sample
+
+    def _samples(self, buf, start, stop):
+        block = decode_block(buf)
+        if block is None:
+            return
+        _, block_start, samples = block
+        if stop is not None and block_start >= stop:
+            return
+        base = block_start * 1000
+        for t_ms, distance in samples:
+            t_ms += base
+            if t_ms >= start * 1000 and (stop is None or t_ms < stop * 1000):
+                yield t_ms, distance
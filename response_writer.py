@@ -0,0 +1,85 @@
+# 带固定大小缓冲区的 HTTP 响应写入器，页面按小块直接写到 socket
+_CRLF = b'\r\n'
+# 这些状态没有响应体: 不发 chunked 头，也不发结束块
+_NO_BODY = ('204', '304')
+
+
+class ResponseWriter:
+    def __init__(self, send, buffer_size=512, chunked=True):
+        self.send = send
+        self.chunked = chunked
+        self.buf = bytearray(buffer_size)
+        self.mv = memoryview(self.buf)
+        self.pos = 0
+        self.bytes_sent = 0
+        self.flushed = False
+        self.body = True
+        self.keep_alive = False
+
+    def start(self, status='200 OK', content_type='text/html', headers=(), keep_alive=False, body=True):
+        # body=False: HEAD 请求，头部与 GET 相同，但不发送响应体和结束块
+        empty = status[:3] in _NO_BODY
+        self.body = body and not empty
+        if empty:
+            self.chunked = False
+            head = f'HTTP/1.1 {status}\r\n'
+        else:
+            head = f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+        if self.chunked:
+            head += 'Transfer-Encoding: chunked\r\n'
+        for name, value in headers:
+            head += f'{name}: {value}\r\n'
+        # 没有 chunked 时只能靠断开连接结束响应；没有响应体的不用
+        self.keep_alive = keep_alive and (self.chunked or not self.body)
+        head += 'Connection: keep-alive\r\n\r\n' if self.keep_alive else 'Connection: close\r\n\r\n'
+        self._send(head.encode())
+
+    def write(self, text):
+        if not self.body:
+            return
+        size = len(self.buf)
+        if isinstance(text, str):
+            if len(text) <= size:
+                self._copy(text.encode())
+            else:
+                # 长字符串按缓冲区大小分段编码，不一次复制出整个字符串的 bytes
+                for start in range(0, len(text), size):
+                    self._copy(text[start:start + size].encode())
+        else:
+            self._copy(text)
+
+    def _copy(self, data):
+        size = len(self.buf)
+        offset = 0
+        while offset < len(data):
+            n = min(size - self.pos, len(data) - offset)
+            self.mv[self.pos:self.pos + n] = data[offset:offset + n]
+            self.pos += n
+            offset += n
+            if self.pos == size:
+                self.flush()
+
+    def flush(self):
+        if not self.pos:
+            return
+        if self.chunked:
+            self._send(('%x\r\n' % self.pos).encode())
+        self._send(self.mv[:self.pos])
+        if self.chunked:
+            self._send(_CRLF)
+        self.pos = 0
+        self.flushed = True
+
+    def close(self):
+        self.flush()
+        if self.chunked and self.body:
+            self._send(b'0\r\n\r\n')
+
+    def _send(self, data):
+        self.send(data)
+        self.bytes_sent += len(data)
+
+    def write_all(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+        self.close()
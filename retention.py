@@ -0,0 +1,61 @@
+import asyncio
+try:
+    import utime
+except ImportError:
+    import time as utime
+from event_store import pack_event, find_start
+from day_index import date_key
+
+_BATCH = 64
+
+
+class Retention:
+    # 只保留最近 keep_days 天的明细事件，更早的按天汇总后追加到归档文件
+    def __init__(self, store, index, archive, keep_days=30):
+        self.store = store
+        self.index = index
+        self.archive = archive
+        self.keep_days = keep_days
+        self.compactions = 0
+
+    def cutoff(self, now):
+        # keep_days 天前那一天的本地零点
+        then = now - self.keep_days * 86400
+        t = utime.localtime(then)
+        return then - (t[3] * 3600 + t[4] * 60 + t[5])
+
+    def due(self, now):
+        events = self.store.events
+        return bool(events) and events[0]['start'] < self.cutoff(now)
+
+    async def compact(self, now):
+        # 分批写新日志并让出执行权，采样定时器和网页在压缩期间照常运行
+        cutoff = self.cutoff(now)
+        cutoff_key = date_key(cutoff)
+        cut = find_start(self.store.events, cutoff)
+        if not cut:
+            return 0
+        # 1. 先归档被删除日期的汇总(与 bench/legacy_pages.py 全量聚合的结果一致)
+        for key, sitting, standing in self.index.summary():
+            if key < cutoff_key:
+                self.archive.append(key, sitting, standing)
+        # 2. 分批写出保留的事件；最后一条可能还在延长，留到最后同步写
+        events = self.store.events
+        tmp_path = self.store.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            i = cut
+            while i < len(events) - 1:
+                end = min(i + _BATCH, len(events) - 1)
+                for j in range(i, end):
+                    f.write(pack_event(events[j]))
+                i = end
+                await asyncio.sleep(0)
+            # 3. 以下不再让出: 补上期间新增或延长的事件，然后原子替换
+            for j in range(i, len(events)):
+                f.write(pack_event(events[j]))
+        # 先保存平移后的索引再替换日志；两步之间断电时 DayIndex.load() 发现下标对不上会重建
+        self.index.drop_before(cutoff_key, cut)
+        self.index.save()
+        self.store.replace(tmp_path, cut)
+        self.compactions += 1
+        return cut
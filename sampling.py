@@ -0,0 +1,55 @@
+# 自适应采样周期: 状态刚切换或读数与当前状态不一致时按基础周期采样，长时间稳定后逐步放慢
+# 最坏检测延迟 = 慢周期 + 确认时间(滤波 + dwell)，慢周期由 max_latency_ms 反推，延迟有上界
+try:
+    from utime import ticks_diff
+except ImportError:
+    def ticks_diff(a, b):
+        return a - b
+
+
+class AdaptiveSampler:
+    # confirm_ms: 第一个变化的读数到检测器确认切换所需的时间；max_latency_ms=None 时固定按 base_ms 采样
+    # thresholds_ms: 坐着的提醒阈值，到点时保证有一次采样，LED 颜色按时变化
+    def __init__(self, base_ms=2000, max_latency_ms=30000, confirm_ms=12000, settle_ms=60000, growth=2,
+                 thresholds_ms=()):
+        if max_latency_ms is None:
+            max_latency_ms = base_ms + confirm_ms
+        if max_latency_ms < base_ms + confirm_ms:
+            raise ValueError('max_latency_ms must cover base_ms + confirm_ms')
+        self.base_ms = base_ms
+        self.max_ms = max_latency_ms - confirm_ms
+        self.settle_ms = settle_ms
+        self.growth = growth
+        self.thresholds_ms = sorted(thresholds_ms)
+        self.period = base_ms
+        self._present = None
+        self._changed = None
+        self.fast = 0  # 按基础周期采样的次数
+        self.slow = 0
+
+    def reset(self):
+        self.period = self.base_ms
+        self._present = None
+
+    def next_period(self, present, consistent, now_ms, sitting_ms=None):
+        # present: 检测器当前状态；consistent: 本次读数是否支持当前状态
+        if present != self._present:
+            self._present = present
+            self._changed = now_ms
+            period = self.base_ms
+        elif not consistent or ticks_diff(now_ms, self._changed) < self.settle_ms:
+            period = self.base_ms
+        else:
+            period = min(self.period * self.growth, self.max_ms)
+        if sitting_ms is not None:
+            for threshold in self.thresholds_ms:
+                if threshold >= sitting_ms:
+                    # 刚越过阈值时采样
+                    period = min(period, max(self.base_ms, threshold - sitting_ms + 1))
+                    break
+        self.period = period
+        if period == self.base_ms:
+            self.fast += 1
+        else:
+            self.slow += 1
+        return period
@@ -0,0 +1,96 @@
+# 有效时段日程: 每周各天的时段、午休等休息时间和节假日，预先展开成按时间排序的切换时刻
+# 时间都是本地时间的秒数(RTC 已按时区校准)，查询只做二分查找，不调用 localtime
+try:
+    import utime
+except ImportError:
+    import time as utime
+from day_index import date_key
+
+_DAY = 86400
+_HORIZON_DAYS = 8
+
+
+def parse_minutes(text):
+    hour, _, minute = text.partition(':')
+    return int(hour) * 60 + int(minute)
+
+
+def _windows(spec):
+    return [(parse_minutes(start), parse_minutes(end)) for start, end in spec]
+
+
+def subtract(windows, breaks):
+    # 从时段里扣掉休息时间，返回排序后的 (开始分钟, 结束分钟)
+    result = []
+    for start, end in sorted(windows):
+        for b_start, b_end in sorted(breaks):
+            if b_end <= start or b_start >= end:
+                continue
+            if b_start > start:
+                result.append((start, b_start))
+            start = max(start, b_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+class Schedule:
+    # week: weekday(0=周一) -> (('09:00', '12:00'), ...)，结束时间不含；没有列出的日子全天不记录
+    # breaks: 每天都扣掉的时间段；holidays: 'YYYY-MM-DD' 整天不记录
+    def __init__(self, week, breaks=(), holidays=()):
+        breaks = _windows(breaks)
+        self.week = {}
+        for weekday, spec in week.items():
+            self.week[weekday] = subtract(_windows(spec), breaks)
+        self.holidays = set(holidays)
+        self.transitions = []  # [开始, 结束, 开始, 结束, ...]
+        self._from = 0
+        self._until = 0
+        self.compiles = 0
+
+    def compile(self, now):
+        # 从今天 0 点起展开 _HORIZON_DAYS 天
+        midnight = now - now % _DAY
+        transitions = []
+        for d in range(_HORIZON_DAYS):
+            day = midnight + d * _DAY
+            if date_key(day) in self.holidays:
+                continue
+            for start, end in self.week.get(utime.localtime(day)[6], ()):
+                start = day + start * 60
+                end = day + end * 60
+                if transitions and transitions[-1] == start:
+                    # 与前一段首尾相接(例如跨过 0 点)，合并成一段
+                    transitions[-1] = end
+                else:
+                    transitions.append(start)
+                    transitions.append(end)
+        self.transitions = transitions
+        self._from = midnight
+        self._until = midnight + _HORIZON_DAYS * _DAY
+        self.compiles += 1
+
+    def _position(self, now):
+        # 不晚于 now 的切换时刻个数，奇数表示处于有效时段内
+        if not self._from <= now < self._until - _DAY:
+            self.compile(now)
+        lo, hi = 0, len(self.transitions)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.transitions[mid] <= now:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def active(self, now):
+        return self._position(now) % 2 == 1
+
+    def next_transition(self, now):
+        # 下一次状态切换的时刻；展开范围内没有切换时返回范围末尾，届时重新展开
+        i = self._position(now)
+        if i < len(self.transitions):
+            return self.transitions[i]
+        return self._until - _DAY
@@ -0,0 +1,109 @@
+from machine import Pin
+import utime
+from vl53l0x import VL53L0X, PROFILES
+
+DEFAULT_ADDRESS = 0x29
+_STAGGER_MAX_MS = 40  # 默认配置下一次测距约 33ms
+
+
+class SensorManager:
+    # 同一条 I2C 总线上的多个 VL53L0X: 依次通过 XSHUT 上电并改地址，之后并行连续测距，轮询只做非阻塞检查
+    def __init__(self, i2c, specs, base_address=0x30):
+        # specs: [(name, xshut 引脚号或 None, GPIO1 中断引脚号或 None[, PROFILES 中的配置名]), ...]
+        if sum(1 for spec in specs if spec[1] is None) > 1:
+            raise ValueError('only one sensor may be wired without XSHUT')
+        self.profiles = {spec[0]: spec[3] if len(spec) > 3 else None for spec in specs}
+        for name, profile in self.profiles.items():
+            if profile is not None and profile not in PROFILES:
+                raise ValueError(f'unknown profile {profile!r} for sensor {name!r}')
+        self.i2c = i2c
+        self.specs = [tuple(spec[:3]) for spec in specs]
+        self.base_address = base_address
+        self.sensors = {}
+        self.pins = {}
+        self.latest = {}
+        self.xshut = {}
+        self.addresses = {}
+
+    def bring_up(self):
+        # 先把所有带 XSHUT 的传感器拉低复位，没有 XSHUT 的那个此时独占 0x29
+        for name, xshut, int_pin in self.specs:
+            if xshut is not None:
+                self.xshut[name] = Pin(xshut, Pin.OUT, value=0)
+        utime.sleep_ms(10)
+        order = sorted(self.specs, key=lambda spec: spec[1] is not None)
+        for i, (name, xshut, int_pin) in enumerate(order):
+            if xshut is not None:
+                self.xshut[name].value(1)
+                utime.sleep_ms(2)  # 上电引导时间约 1.2ms
+            self.addresses[name] = self.base_address + i if len(self.specs) > 1 else DEFAULT_ADDRESS
+            self._init(name)
+            self.pins[name] = None if int_pin is None else Pin(int_pin, Pin.IN, Pin.PULL_UP)
+        return self.sensors
+
+    def _init(self, name):
+        sensor = VL53L0X(self.i2c, DEFAULT_ADDRESS)
+        if self.addresses[name] != DEFAULT_ADDRESS:
+            sensor.set_address(self.addresses[name])
+        # 重新上电后寄存器回到默认值，restore() 也走这里，所以每次初始化都要重新设置
+        profile = self.profiles[name]
+        if profile is not None and not sensor.set_profile(profile):
+            raise OSError(f'failed to set profile {profile!r} on sensor {name!r}')
+        self.sensors[name] = sensor
+        self.latest[name] = None
+
+    def restore(self):
+        # power_down() 之后重新上电: 只初始化被 XSHUT 关断的传感器，逐个改回原来分配的地址
+        # 没有 XSHUT 的传感器一直上电，已经在分配的地址上，不能再按 0x29 初始化
+        for name, pin in self.xshut.items():
+            if pin.value():
+                continue
+            pin.value(1)
+            utime.sleep_ms(2)
+            try:
+                self._init(name)
+            except OSError:
+                pin.value(0)  # 下次重试时仍从关断状态开始，不会和别的传感器抢 0x29
+                raise
+        return self.sensors
+
+    def get(self, name):
+        return self.sensors[name]
+
+    def start(self, period=100, callbacks=None):
+        # 定时连续测距，各传感器启动时间错开 period/n，测量在时间上重叠而总线访问不扎堆
+        # 错开最多一次测距的时间，周期很长时启动也不会阻塞太久；callbacks: {名称: 数据就绪时调用的函数}
+        stagger = min(period // max(1, len(self.sensors)), _STAGGER_MAX_MS)
+        for i, (name, sensor) in enumerate(self.sensors.items()):
+            if i:
+                utime.sleep_ms(stagger)
+            sensor.start_continuous(period, pin=self.pins[name], callback=(callbacks or {}).get(name))
+
+    def stop(self):
+        for sensor in self.sensors.values():
+            sensor.stop_continuous()
+
+    def cycle(self):
+        # 轮询一轮: 有中断引脚的只读缓冲区，否则查一次状态寄存器
+        for name, sensor in self.sensors.items():
+            if self.pins[name] is not None:
+                value = None
+                while True:
+                    sample = sensor.get()
+                    if sample is None:
+                        break
+                    value = sample
+            else:
+                value = sensor.poll()
+                while sensor.get() is not None:
+                    pass
+            if value is not None:
+                self.latest[name] = value
+        return self.latest
+
+    def power_down(self, name):
+        # 通过 XSHUT 关断，重新上电需要再次 bring_up()
+        sensor = self.sensors[name]
+        sensor.stop_continuous()
+        if name in self.xshut:
+            self.xshut[name].value(0)
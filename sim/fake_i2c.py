@@ -0,0 +1,282 @@
+# 记录事务的仿真 I2C 总线和寄存器级 VL53L0X 模型
+from simclock import clock
+
+_ENODEV = 19
+_EIO = 5
+
+
+class FakeI2CBus:
+    def __init__(self, freq=400000):
+        self.freq = freq
+        self.devices = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.transactions = 0
+        self.reads = 0
+        self.writes = 0
+        self.bytes = 0
+        self.bus_time_us = 0.0
+        self.log = None
+
+    def record(self, log=True):
+        self.log = [] if log else None
+
+    def attach(self, device):
+        # 同一地址可以挂多个器件(例如上电默认都是 0x29)，但同时只能有一个处于上电状态
+        self.devices.append(device)
+        device.bus = self
+
+    def move(self, device, new_address):
+        device.address = new_address
+
+    def _device(self, addr):
+        found = [d for d in self.devices if d.powered and d.address == addr]  # powered 会按 XSHUT 电平复位地址
+        if not found:
+            raise OSError(_ENODEV)
+        if len(found) > 1:
+            raise OSError(_EIO)
+        return found[0]
+
+    def _account(self, kind, addr, reg, nbytes):
+        # 每个字节 9 个时钟(含 ACK)，另加 start/stop；读操作多一次 repeated start + 地址
+        bits = 9 * (2 + nbytes) + 2
+        if kind == 'r':
+            bits += 9 + 1
+            self.reads += 1
+        else:
+            self.writes += 1
+        self.transactions += 1
+        self.bytes += nbytes
+        self.bus_time_us += bits * 1000000 / self.freq
+        if self.log is not None:
+            self.log.append((kind, addr, reg, nbytes))
+        return bits * 1000000 // self.freq
+
+    def _elapse(self, us):
+        # 事务完成后虚拟时间前进相应的总线时间，期间到期的定时器和中断在事务之间执行
+        clock.advance(us)
+
+    def readfrom_mem(self, addr, reg, nbytes, addrsize=8):
+        device = self._device(addr)
+        us = self._account('r', addr, reg, nbytes)
+        data = bytes(device.read(reg, nbytes))
+        self._elapse(us)
+        return data
+
+    def readfrom_mem_into(self, addr, reg, buf, addrsize=8):
+        buf[:] = self.readfrom_mem(addr, reg, len(buf))
+
+    def writeto_mem(self, addr, reg, data, addrsize=8):
+        device = self._device(addr)
+        us = self._account('w', addr, reg, len(data))
+        device.write(reg, bytes(data))
+        self._elapse(us)
+
+    def scan(self):
+        return sorted(set(d.address for d in self.devices if d.powered))
+
+
+_SYSRANGE_START = 0x00
+_MEASURE_PERIOD = 0x04
+_INTERRUPT_GPIO = 0x0a
+_INTERRUPT_CLEAR = 0x0b
+_RESULT_INTERRUPT_STATUS = 0x13
+_RESULT_RANGE = 0x14 + 10
+_GPIO_MUX_ACTIVE_HIGH = 0x84
+_I2C_SLAVE_DEVICE_ADDRESS = 0x8a
+_OSC_CALIBRATE = 0xf8
+_PAGE = 0xff
+
+
+class VL53L0XModel:
+    # 只模拟驱动用到的行为: 分页寄存器、单次/连续测距、数据就绪中断和地址修改
+    DEFAULT_ADDRESS = 0x29
+
+    def __init__(self, address=DEFAULT_ADDRESS, distance=500, measurement_us=None, int_pin=None, xshut_pin=None):
+        self.address = address
+        self.distance = distance
+        self.measurement_us = measurement_us
+        self.int_pin = int_pin
+        self.xshut_pin = xshut_pin
+        self.bus = None
+        self._powered = True
+        self.samples = 0
+        self.ranging_us = 0  # 累计测距时间，供能耗模型使用
+        self.reset()
+
+    def reset(self):
+        self.regs = {}
+        self.page = 0
+        self.mode = None
+        self._pending = None
+        self.regs[(0, 0xc0)] = 0xee
+        self.regs[(1, 0x91)] = 0x3c
+        self.regs[(7, 0x92)] = 0x86
+        for i in range(6):
+            self.regs[(0, 0xb0 + i)] = 0xff
+
+    @property
+    def powered(self):
+        if self.xshut_pin is not None:
+            import machine
+            self.power(machine.Pin.level(self.xshut_pin))
+        return self._powered
+
+    def power(self, on):
+        # XSHUT 拉低时器件复位，重新上电后寄存器和地址都回到默认值
+        on = bool(on)
+        if on and not self._powered:
+            self.reset()
+            self.address = self.DEFAULT_ADDRESS
+        elif not on and self._powered:
+            self.stop()
+        self._powered = on
+
+    def _reg16(self, reg):
+        return (self.regs.get((0, reg), 0) << 8) | self.regs.get((0, reg + 1), 0)
+
+    def timing_budget_us(self):
+        # 按 ST 文档的公式从当前寄存器推算一次测距耗时，与驱动的实现相互独立
+        def macro_ns(vcsel_reg):
+            return (2304 * ((vcsel_reg + 1) << 1) * 1655 + 500) // 1000
+
+        def decode(value):
+            return ((value & 0xff) << (value >> 8)) + 1
+
+        seq = self.regs.get((0, 0x01), 0xff)
+        pre_ns = macro_ns(self.regs.get((0, 0x50), 0))
+        final_ns = macro_ns(self.regs.get((0, 0x70), 0))
+        msrc_us = ((self.regs.get((0, 0x46), 0) + 1) * pre_ns + 500) // 1000
+        pre_mclks = decode(self._reg16(0x51))
+        final_mclks = decode(self._reg16(0x71))
+        budget = 1910 + 960
+        if seq & 0x10:
+            budget += msrc_us + 590
+        if seq & 0x08:
+            budget += 2 * (msrc_us + 690)
+        elif seq & 0x04:
+            budget += msrc_us + 660
+        if seq & 0x40:
+            budget += (pre_mclks * pre_ns + 500) // 1000 + 660
+            final_mclks -= pre_mclks
+        if seq & 0x80:
+            budget += (final_mclks * final_ns + 500) // 1000 + 550
+        return budget
+
+    def sample_us(self):
+        return self.measurement_us if self.measurement_us is not None else self.timing_budget_us()
+
+    def current_distance(self):
+        d = self.distance
+        return int(d(clock.now_us / 1000000)) if callable(d) else int(d)
+
+    def _key(self, reg):
+        return (0 if reg == _PAGE else self.page, reg)
+
+    def read(self, reg, n):
+        out = []
+        for r in range(reg, reg + n):
+            key = self._key(r)
+            if key == (7, 0x83) and not self.regs.get(key):
+                self.regs[key] = 0x10  # SPAD 信息读取完成
+            out.append(self.regs.get(key, 0))
+        return out
+
+    def write(self, reg, data):
+        for i, value in enumerate(data):
+            r = reg + i
+            if r == _PAGE:
+                self.page = value
+                self.regs[(0, _PAGE)] = value
+                continue
+            self.regs[self._key(r)] = value
+            if self.page == 0:
+                self._side_effect(r, value)
+
+    def _side_effect(self, reg, value):
+        if reg == _SYSRANGE_START:
+            if value & 0x01:
+                if self.mode is None:
+                    # 单次测距开始后 bit0 立即自动清零
+                    self.regs[(0, _SYSRANGE_START)] = 0
+                    self._schedule(self.sample_us(), single=True)
+                else:
+                    self.stop()
+            elif value & 0x02:
+                self.mode = 'back-to-back'
+                self._schedule(self.sample_us())
+            elif value & 0x04:
+                self.mode = 'timed'
+                self._schedule(max(self.sample_us(), self.period_us()))
+        elif reg == _INTERRUPT_CLEAR and value & 0x01:
+            self.regs[(0, _RESULT_INTERRUPT_STATUS)] = 0
+            self._set_pin(False)
+        elif reg == _I2C_SLAVE_DEVICE_ADDRESS:
+            self.bus.move(self, value & 0x7f)
+
+    def period_us(self):
+        period = 0
+        for i in range(4):  # 32 位寄存器
+            period = (period << 8) | self.regs.get((0, _MEASURE_PERIOD + i), 0)
+        osc = (self.regs.get((0, _OSC_CALIBRATE), 0) << 8) | self.regs.get((0, _OSC_CALIBRATE + 1), 0)
+        if osc:
+            period //= osc
+        return period * 1000
+
+    def stop(self):
+        self.mode = None
+        if self._pending is not None:
+            clock.cancel(self._pending)
+            self._pending = None
+        self.regs[(0, _SYSRANGE_START)] = 0
+
+    def _schedule(self, delay_us, single=False):
+        if self._pending is not None:
+            clock.cancel(self._pending)
+        self._pending = clock.call_later(delay_us, self._complete, single)
+
+    def _complete(self, single):
+        self._pending = None
+        if not self.powered:
+            return
+        self.samples += 1
+        self.ranging_us += self.sample_us()
+        value = self.current_distance()
+        self.regs[(0, _RESULT_RANGE)] = (value >> 8) & 0xff
+        self.regs[(0, _RESULT_RANGE + 1)] = value & 0xff
+        self.regs[(0, _RESULT_INTERRUPT_STATUS)] = 0x04
+        self._set_pin(True)
+        if self.mode == 'back-to-back':
+            self._schedule(self.sample_us())
+        elif self.mode == 'timed':
+            self._schedule(max(self.sample_us(), self.period_us()))
+
+    def _set_pin(self, asserted):
+        # GPIO1 默认低电平有效，_GPIO_MUX_ACTIVE_HIGH 的 bit4 置位时高电平有效
+        if self.int_pin is None or self.regs.get((0, _INTERRUPT_GPIO), 0) != 0x04:
+            return
+        import machine
+        active_high = bool(self.regs.get((0, _GPIO_MUX_ACTIVE_HIGH), 0) & 0x10)
+        machine.Pin.drive(self.int_pin, asserted == active_high)
+
+
+_buses = {}
+
+
+def reset():
+    _buses.clear()
+
+
+def pin_changed(pin, level):
+    # machine.Pin 电平变化时调用: XSHUT 拉低时器件立即断电，不等到下一次总线访问才发现
+    for bus in _buses.values():
+        for device in bus.devices:
+            if getattr(device, 'xshut_pin', None) == pin:
+                device.power(level)
+
+
+def bus(bus_id=0):
+    if bus_id not in _buses:
+        _buses[bus_id] = FakeI2CBus()
+    return _buses[bus_id]
@@ -0,0 +1,150 @@
+# 仿真版 machine 模块: Pin、I2C、Timer 都挂在虚拟时钟和仿真总线上
+from simclock import clock
+import fake_i2c
+import utime
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    # 同一个引脚号的所有 Pin 对象共享电平和中断处理函数
+    _levels = {}
+    _irqs = {}
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        if id not in Pin._levels:
+            Pin._levels[id] = 1 if pull == Pin.PULL_UP else 0
+        if value is not None:
+            self.value(value)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return Pin._levels[self.id]
+        Pin.drive(self.id, v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        if handler is None:
+            Pin._irqs.pop(self.id, None)
+        else:
+            Pin._irqs[self.id] = (handler, trigger, self)
+
+    @staticmethod
+    def level(id):
+        return Pin._levels.get(id, 0)
+
+    @staticmethod
+    def drive(id, level):
+        level = 1 if level else 0
+        old = Pin._levels.get(id, 0)
+        Pin._levels[id] = level
+        if old != level:
+            fake_i2c.pin_changed(id, level)
+        irq = Pin._irqs.get(id)
+        if irq is None or old == level:
+            return
+        handler, trigger, pin = irq
+        if (level and trigger & Pin.IRQ_RISING) or (not level and trigger & Pin.IRQ_FALLING):
+            handler(pin)
+
+
+class I2C:
+    def __init__(self, id=0, scl=None, sda=None, freq=400000):
+        self.bus = fake_i2c.bus(id)
+        self.bus.freq = freq
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        return self.bus.readfrom_mem(addr, memaddr, nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        self.bus.readfrom_mem_into(addr, memaddr, buf)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self.bus.writeto_mem(addr, memaddr, buf)
+
+    def scan(self):
+        return self.bus.scan()
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self.id = id
+        self._entry = None
+
+    def init(self, period=1000, mode=PERIODIC, callback=None, freq=None):
+        self.deinit()
+        if freq:
+            period = 1000 // freq
+        self.period_us = int(period * 1000)
+        self.mode = mode
+        self.callback = callback
+        self._entry = clock.call_later(self.period_us, self._fire)
+
+    def _fire(self):
+        self._entry = None
+        if self.mode == Timer.PERIODIC:
+            self._entry = clock.call_later(self.period_us, self._fire)
+        if self.callback is not None:
+            self.callback(self)
+
+    def deinit(self):
+        if self._entry is not None:
+            clock.cancel(self._entry)
+            self._entry = None
+
+
+class RTC:
+    def datetime(self, dt=None):
+        # (year, month, day, weekday, hours, minutes, seconds, subseconds)
+        if dt is None:
+            t = utime.localtime()
+            return (t[0], t[1], t[2], t[6], t[3], t[4], t[5], 0)
+        clock.set_time(utime.mktime((dt[0], dt[1], dt[2], dt[4], dt[5], dt[6], 0, 0)))
+
+
+def freq(hz=None):
+    return 160000000
+
+
+def reset():
+    raise SystemExit('machine.reset()')
+
+
+# 浅睡眠的累计虚拟时间，供能耗模型使用
+slept_us = 0
+
+
+def lightsleep(ms=None):
+    global slept_us
+    slept_us += int(ms or 0) * 1000
+    clock.advance(int(ms or 0) * 1000)
+
+
+def deepsleep(ms=None):
+    raise SystemExit('machine.deepsleep()')
+
+
+def idle():
+    clock.advance(1000)
@@ -0,0 +1,14 @@
+# 仿真版 micropython 模块
+
+
+def const(value):
+    return value
+
+
+def schedule(func, arg):
+    func(arg)
+    return True
+
+
+def alloc_emergency_exception_buf(size):
+    pass
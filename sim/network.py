@@ -0,0 +1,89 @@
+# 仿真版 network: WLAN 在虚拟时间 connect_delay_ms 之后连上，available=False 模拟断网
+from simclock import clock
+
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 1010
+
+connect_delay_ms = 1500
+available = True
+# 在这个虚拟时间之前网络不可用(AP 不在线)，恢复后 connect_delay_ms 才连上
+down_until_us = 0
+# 没连上时每次 isconnected() 消耗的虚拟时间，模拟固件里等待连接的忙等循环
+poll_cost_us = 1000
+
+_interfaces = {}
+
+
+def up():
+    return available and clock.now_us >= down_until_us
+
+
+class WLAN:
+    PM_NONE = 0
+    PM_PERFORMANCE = 1
+    PM_POWERSAVE = 2
+
+    def __new__(cls, interface=STA_IF):
+        if interface not in _interfaces:
+            wlan = object.__new__(cls)
+            wlan.interface = interface
+            wlan._active = False
+            wlan._connected_at = None
+            wlan.ssid = None
+            wlan.pm = WLAN.PM_PERFORMANCE
+            wlan.pm_us = {}  # 每种省电模式下已连接的时间
+            wlan._pm_since = clock.now_us
+            _interfaces[interface] = wlan
+        return _interfaces[interface]
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self._active
+        self.account()
+        self._active = bool(is_active)
+        if not self._active:
+            self._connected_at = None
+
+    def connect(self, ssid=None, key=None):
+        self.account()
+        self.ssid = ssid
+        self._connected_at = clock.now_us + connect_delay_ms * 1000
+
+    def disconnect(self):
+        self.account()
+        self._connected_at = None
+
+    def isconnected(self):
+        connected = (up() and self._active and self._connected_at is not None
+                     and clock.now_us >= max(self._connected_at, down_until_us + connect_delay_ms * 1000))
+        if not connected:
+            clock.advance(poll_cost_us)  # 只有等待连接时固件才在循环里反复查询
+        return connected
+
+    def status(self, param=None):
+        if self.isconnected():
+            return STAT_GOT_IP
+        return STAT_CONNECTING if self._connected_at is not None else STAT_IDLE
+
+    def ifconfig(self, config=None):
+        return ('127.0.0.1', '255.0.0.0', '127.0.0.1', '127.0.0.1')
+
+    def config(self, *args, **kwargs):
+        if 'pm' in kwargs:
+            self.account()
+            self.pm = kwargs['pm']
+        elif args == ('pm',):
+            return self.pm
+        return None
+
+    def account(self):
+        # 把上次记账以来的时间计入当前省电模式(未连接时不计)
+        now = clock.now_us
+        if self._connected_at is not None:
+            since = max(self._pm_since, self._connected_at)
+            if now > since:
+                self.pm_us[self.pm] = self.pm_us.get(self.pm, 0) + now - since
+        self._pm_since = now
@@ -0,0 +1,24 @@
+# 仿真版 ntptime: 网络可用时把 RTC 设成虚拟时钟的真实 UTC 时间
+import network
+from simclock import clock
+
+host = 'pool.ntp.org'
+timeout = 1
+# 依次消耗的失败次数，用来模拟 NTP 服务器不可达
+failures = 0
+requests = 0
+
+
+def time():
+    global failures, requests
+    requests += 1
+    if failures > 0:
+        failures -= 1
+        raise OSError(110)
+    if not network.up() or not network.WLAN(network.STA_IF).isconnected():
+        raise OSError(113)
+    return clock.true_time()
+
+
+def settime():
+    clock.set_time(time())
@@ -0,0 +1,227 @@
+# 在 Linux 上运行整个固件: boot.py + main.py，虚拟时钟可以比真实时间快任意倍
+# 用法: python sim/run.py --start "2024-01-02 08:55" --hours 8 --speed 0 --port 8080
+import argparse
+import asyncio
+import calendar
+import contextlib
+import io
+import os
+import random
+import runpy
+import sys
+import tempfile
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SIM_DIR)
+
+
+def install():
+    # sim 目录放在最前面，让 machine/utime/neopixel/network/ntptime 解析到仿真实现
+    for path in (ROOT, SIM_DIR):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+
+
+def parse_local(text):
+    return calendar.timegm(time.strptime(text, '%Y-%m-%d %H:%M'))
+
+
+def synthetic_distance(seed=1, sit_min=(25, 50), away_min=(3, 10)):
+    # 按虚拟时间生成距离: 坐着 120~170mm，离开 400~800mm，带噪声
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    sitting = True
+
+    def distance(t_s):
+        nonlocal t, sitting
+        while not segments or segments[-1][1] <= t_s:
+            length = rng.randint(*(sit_min if sitting else away_min)) * 60
+            base = rng.randint(120, 170) if sitting else rng.randint(400, 800)
+            segments.append((t, t + length, base))
+            t += length
+            sitting = not sitting
+        for start, end, base in reversed(segments):
+            if start <= t_s:
+                return max(0, base + int(rng.gauss(0, 10)))
+        return segments[0][2]
+
+    # (开始秒, 结束秒, 基准距离)，坐着和离开交替，第一段是坐着；用于统计检测延迟
+    distance.segments = segments
+    return distance
+
+
+def trace_distance(path):
+    # CSV "t_ms,distance_mm"，t_ms 相对仿真开始时间，取不超过当前时间的最近一条
+    points = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                t_ms, d = line.split(',')[:2]
+                points.append((int(t_ms) / 1000, int(d)))
+    points.sort()
+    times = [p[0] for p in points]
+
+    def distance(t_s):
+        import bisect
+        i = bisect.bisect_right(times, t_s) - 1
+        return points[max(i, 0)][1]
+
+    return distance
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    # asyncio 的 sleep/wait_for 按虚拟时钟计时；Simulation.run() 每步都让出，selector 不会真正阻塞
+    def time(self):
+        from simclock import clock
+        return clock.now_us / 1000000
+
+
+class Simulation:
+    def __init__(self, start_local, tz_offset_h=8, distance=None, workdir=None, quiet=False):
+        install()
+        from simclock import clock
+        import fake_i2c
+        import machine
+        import network
+        import neopixel
+        import ntptime
+        self.clock = clock
+        self.fake_i2c = fake_i2c
+        # 同一进程里可以先后创建多个仿真，硬件状态每次重新开始
+        clock.clear()
+        fake_i2c.reset()
+        neopixel.instances.clear()
+        network._interfaces.clear()
+        network.available = True
+        network.down_until_us = 0
+        ntptime.failures = 0
+        ntptime.requests = 0
+        machine.slept_us = 0
+        # 真实 UTC；RTC 在 NTP 同步前停在 2000-01-01
+        clock.true_epoch = start_local - tz_offset_h * 3600
+        clock.epoch = 946684800
+        self.bus = fake_i2c.bus(0)
+        self.sensor_model = fake_i2c.VL53L0XModel(distance=distance or synthetic_distance())
+        self.bus.attach(self.sensor_model)
+        self.workdir = workdir or tempfile.mkdtemp(prefix='long-sitting-')
+        self.quiet = quiet
+        self.main = None
+
+    def firmware_output(self):
+        return contextlib.redirect_stdout(io.StringIO()) if self.quiet else contextlib.nullcontext()
+
+    def boot(self):
+        os.chdir(self.workdir)
+        with self.firmware_output():
+            runpy.run_path(os.path.join(ROOT, 'boot.py'), run_name='boot')
+            import main
+        self.main = main
+        return main
+
+    def execute(self, coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                # 固件任务都是无限循环，在这里取消掉；留给 Runner 关闭时取消的话，
+                # 事件循环会按虚拟时间的定时器去真实地等待
+                current = asyncio.current_task()
+                tasks = [task for task in asyncio.all_tasks() if task is not current]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        with asyncio.Runner(loop_factory=VirtualTimeLoop) as runner:
+            return runner.run(main())
+
+    async def run(self, seconds, speed=0, port=None, step_ms=100):
+        # speed=0 时尽快推进虚拟时间；否则每真实秒推进 speed 秒
+        main = self.main
+        if port is not None:
+            main.HTTP_HOST = '127.0.0.1'
+            main.HTTP_PORT = port
+        # 采样和写入在固件自己的任务里，不开网页时也要启动
+        firmware_task = asyncio.ensure_future(main.serve(http=port is not None))
+        start = self.clock.now_us
+        end = start + int(seconds * 1000000)
+        real_start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        with self.firmware_output():
+            while self.clock.now_us < end:
+                target = end
+                if speed:
+                    target = min(end, start + int((time.monotonic() - real_start) * speed * 1000000))
+                step_us = min(step_ms * 1000, target - self.clock.now_us)
+                # 还有就绪的任务(例如分批加载日志)时先让它们跑完，虚拟时间不前进
+                if loop._ready:
+                    step_us = 0
+                if step_us > 0:
+                    self.clock.advance(step_us)
+                # 有限速度时跟上真实时间后等 10ms；事件循环按虚拟时间计时，这里只能真实地睡
+                if speed and self.clock.now_us >= target:
+                    time.sleep(0.01)
+                await asyncio.sleep(0)
+        firmware_task.cancel()
+
+    def report(self):
+        import energy
+        import neopixel
+        main = self.main
+        events = main.data_log['events']
+        writes = sum(len(np.writes) for np in neopixel.instances)
+        return {
+            'virtual_s': self.clock.now_us / 1000000,
+            'events': len(events),
+            'flash_bytes': main.store.bytes_written + main.day_index.bytes_written,
+            'flash_writes': main.store.writes,
+            'i2c_transactions': self.bus.transactions,
+            'i2c_bus_ms': round(self.bus.bus_time_us / 1000, 1),
+            'sensor_samples': self.sensor_model.samples,
+            'neopixel_writes': writes,
+            'ticks': main.ticker.ticks,
+            'missed_ticks': main.ticker.missed,
+            'mAh_per_day': energy.estimate(self)['total'],
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the firmware against simulated hardware')
+    parser.add_argument('--start', default='2024-01-02 08:55', help='device local start time')
+    parser.add_argument('--hours', type=float, default=1)
+    parser.add_argument('--speed', type=float, default=0, help='virtual seconds per real second, 0 = unlimited')
+    parser.add_argument('--port', type=int, default=None, help='serve the web UI on 127.0.0.1:PORT')
+    parser.add_argument('--trace', help='CSV of t_ms,distance_mm to replay instead of synthetic data')
+    parser.add_argument('--workdir', help='directory for the flash files (default: temp dir)')
+    parser.add_argument('--quiet', action='store_true', help='hide firmware print output')
+    parser.add_argument('--profile', action='store_true', help='run under cProfile and print the top entries')
+    args = parser.parse_args(argv)
+
+    distance = trace_distance(args.trace) if args.trace else None
+    sim = Simulation(parse_local(args.start), distance=distance, workdir=args.workdir, quiet=args.quiet)
+
+    def run():
+        sim.boot()
+        sim.execute(sim.run(args.hours * 3600, args.speed, args.port))
+
+    t0 = time.perf_counter()
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(run)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+    else:
+        run()
+    report = sim.report()
+    report['real_s'] = round(time.perf_counter() - t0, 2)
+    for name, value in report.items():
+        print(f"{name:>18}: {value}")
+    return sim
+
+
+if __name__ == '__main__':
+    main()
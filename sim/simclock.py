@@ -0,0 +1,60 @@
+# 仿真用的虚拟时钟: 时间只在 sleep/advance 时前进，到期的回调按时间顺序执行
+import heapq
+
+EPOCH = 1704067200  # 2024-01-01 00:00:00，虚拟 RTC 的初始时间
+
+
+class Clock:
+    def __init__(self, epoch=EPOCH):
+        self.now_us = 0
+        self.epoch = epoch
+        # 真实的 UTC 时间(NTP 服务器看到的)，RTC 的 epoch 可以与之不同
+        self.true_epoch = epoch
+        self._queue = []
+        self._seq = 0
+
+    def clear(self):
+        # 丢弃所有待执行的回调(上一次仿真留下的定时器等)，时间回到 0
+        self._queue = []
+        self.now_us = 0
+
+    def call_at(self, t_us, callback, *args):
+        self._seq += 1
+        entry = [t_us, self._seq, callback, args]
+        heapq.heappush(self._queue, entry)
+        return entry
+
+    def call_later(self, delay_us, callback, *args):
+        return self.call_at(self.now_us + delay_us, callback, *args)
+
+    def cancel(self, entry):
+        entry[2] = None
+
+    def advance_to(self, t_us):
+        while self._queue and self._queue[0][0] <= t_us:
+            when, _, callback, args = heapq.heappop(self._queue)
+            if callback is None:
+                continue
+            self.now_us = max(self.now_us, when)
+            callback(*args)
+        self.now_us = max(self.now_us, t_us)
+
+    def advance(self, delay_us):
+        self.advance_to(self.now_us + delay_us)
+
+    def next_due(self):
+        while self._queue and self._queue[0][2] is None:
+            heapq.heappop(self._queue)
+        return self._queue[0][0] if self._queue else None
+
+    def time(self):
+        return self.epoch + self.now_us // 1000000
+
+    def set_time(self, seconds):
+        self.epoch = seconds - self.now_us // 1000000
+
+    def true_time(self):
+        return self.true_epoch + self.now_us // 1000000
+
+
+clock = Clock()
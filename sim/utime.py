@@ -0,0 +1,51 @@
+# 仿真版 utime，所有时间来自 simclock 的虚拟时钟
+import time as _time
+from simclock import clock
+
+_TICKS_PERIOD = 1 << 30
+
+
+def ticks_us():
+    return clock.now_us % _TICKS_PERIOD
+
+
+def ticks_ms():
+    return (clock.now_us // 1000) % _TICKS_PERIOD
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) % _TICKS_PERIOD
+
+
+def ticks_diff(a, b):
+    return ((a - b + _TICKS_PERIOD // 2) % _TICKS_PERIOD) - _TICKS_PERIOD // 2
+
+
+def sleep_us(us):
+    clock.advance(int(us))
+
+
+def sleep_ms(ms):
+    clock.advance(int(ms) * 1000)
+
+
+def sleep(seconds):
+    clock.advance(int(seconds * 1000000))
+
+
+def time():
+    return clock.time()
+
+
+def localtime(secs=None):
+    # 设备上 RTC 存的就是本地时间，这里同样不做时区转换
+    t = _time.gmtime(clock.time() if secs is None else secs)
+    return (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec, t.tm_wday, t.tm_yday)
+
+
+gmtime = localtime
+
+
+def mktime(t):
+    import calendar
+    return calendar.timegm((t[0], t[1], t[2], t[3], t[4], t[5], 0, 0, 0))
@@ -0,0 +1,69 @@
+# 定时器回调只记录一次 tick 并唤醒等待的任务，采样和写 flash 都在 asyncio 任务里完成
+import asyncio
+import utime
+
+# ThreadSafeFlag 可以在中断/定时器回调里 set；没有时(CPython 仿真)退回到 Event
+_Flag = getattr(asyncio, 'ThreadSafeFlag', None)
+
+
+class Ticker:
+    def __init__(self, instrument=False):
+        self.instrument = instrument
+        self._flag = _Flag() if _Flag else asyncio.Event()
+        self._pending = False
+        self.ticks = 0
+        self.missed = 0  # 上一个 tick 还没被处理时又来了一个
+        self.callback_us = 0
+        self.callback_max_us = 0
+        self.work_us = 0
+        self.work_max_us = 0
+        self.handled = 0
+
+    def irq(self, _):
+        # 在定时器回调里执行: 不分配内存、不做 I/O、不 print
+        if self.instrument:
+            t0 = utime.ticks_us()
+        self.ticks += 1
+        if self._pending:
+            self.missed += 1
+        self._pending = True
+        self._flag.set()
+        if self.instrument:
+            us = utime.ticks_diff(utime.ticks_us(), t0)
+            self.callback_us += us
+            if us > self.callback_max_us:
+                self.callback_max_us = us
+
+    async def wait(self):
+        await self._flag.wait()
+        if not _Flag:
+            self._flag.clear()
+        self._pending = False
+
+    async def run(self, work):
+        # 每个 tick 调用一次 work()；work 里的异常不会让任务退出
+        while True:
+            await self.wait()
+            t0 = utime.ticks_us()
+            try:
+                work()
+            except Exception as e:
+                print(f"Error in tick handler: {e}")
+            if self.instrument:
+                us = utime.ticks_diff(utime.ticks_us(), t0)
+                self.work_us += us
+                if us > self.work_max_us:
+                    self.work_max_us = us
+            self.handled += 1
+
+    def stats(self):
+        handled = self.handled or 1
+        ticks = self.ticks or 1
+        return {
+            'ticks': self.ticks,
+            'missed': self.missed,
+            'callback_avg_us': self.callback_us // ticks,
+            'callback_max_us': self.callback_max_us,
+            'work_avg_us': self.work_us // handled,
+            'work_max_us': self.work_max_us,
+        }
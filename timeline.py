@@ -0,0 +1,24 @@
+# 启动时间线: 记录各阶段完成的时刻，ticks_ms 从上电开始计数
+import utime
+
+
+class Timeline:
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+        self.marks = []
+
+    def mark(self, name):
+        # 同一个里程碑只记第一次
+        for mark, _ in self.marks:
+            if mark == name:
+                return
+        t = utime.ticks_ms()
+        self.marks.append((name, t))
+        if self.verbose:
+            print(f"[boot {t:>6} ms] {name}")
+
+    def get(self, name):
+        for mark, t in self.marks:
+            if mark == name:
+                return t
+        return None
@@ -1,7 +1,8 @@
 from micropython import const
 import ustruct
 import utime
-from machine import Timer
+from machine import Pin
+from array import array
 import time
 
 _IO_TIMEOUT = 1000
@@ -105,18 +106,40 @@ ALGO_PHASECAL_LIM = 0x30
 ALGO_PHASECAL_CONFIG_TIMEOUT = 0x30
 
 
+_PAGE_SELECT = const(0xff)
+
+
+def _volatile(register):
+    # Registers the sensor changes on its own (start/clear bits, status,
+    # results, SPAD handshake); never served from the shadow cache.
+    return (register == _SYSRANGE_START or register == _INTERRUPT_CLEAR or
+            _RESULT_INTERRUPT_STATUS <= register <= _RESULT_RANGE_STATUS + 11 or
+            register == 0x83)
+
+
+# name: (timing budget us, signal rate limit MCPS, pre-range VCSEL pclks,
+#        final range VCSEL pclks)
+PROFILES = {
+    'fast': (20000, 0.25, 14, 10),
+    'default': (33000, 0.25, 14, 10),
+    'accurate': (200000, 0.25, 14, 10),
+    'long_range': (33000, 0.1, 18, 14),
+}
+
+
 class TimeoutError(RuntimeError):
     pass
 
 
 class VL53L0X:
-    def __init__(self, i2c, address=0x29):
+    def __init__(self, i2c, address=0x29, cache=True):
         self.i2c = i2c
         self.address = address
-        self.init()
-        self._started = False
-        self.measurement_timing_budget_us = 0
-        self.set_measurement_timing_budget(self.measurement_timing_budget_us)
+        # Shadow copy of the registers written or read so far, keyed by
+        # page << 8 | register; the page is unknown until 0xff is written.
+        self._cache = cache
+        self._shadow = {}
+        self._page = None
         self.enables = {"tcc": 0,
                         "dss": 0,
                         "msrc": 0,
@@ -132,23 +155,57 @@ class VL53L0X:
                          "final_range_us": 0
                          }
         self.vcsel_period_type = ["VcselPeriodPreRange", "VcselPeriodFinalRange"]
+        self.measurement_timing_budget_us = 0
+        self.profile = None
+        self.init()
+        self._started = False
+        self._pin = None
+        self._callback = None
+        self._ring = None
+        self._ring_head = 0
+        self._ring_count = 0
 
     def _registers(self, register, values=None, struct='B'):
         if values is None:
             size = ustruct.calcsize(struct)
             data = self.i2c.readfrom_mem(self.address, register, size)
+            self._remember(register, data)
             values = ustruct.unpack(struct, data)
             return values
         data = ustruct.pack(struct, *values)
-        self.i2c.writeto_mem(self.address, register, data)
+        self._write(register, data)
 
     def _register(self, register, value=None, struct='B'):
         if value is None:
             return self._registers(register, struct=struct)[0]
         self._registers(register, (value,), struct=struct)
 
+    def _write(self, register, data):
+        if (self._cache and register == _PAGE_SELECT and len(data) == 1
+                and data[0] == self._page):
+            return
+        self.i2c.writeto_mem(self.address, register, data)
+        self._remember(register, data)
+
+    def _remember(self, register, data):
+        if not self._cache:
+            return
+        for i in range(len(data)):
+            reg = register + i
+            if reg == _PAGE_SELECT:
+                self._page = data[i]
+            elif self._page is not None and not _volatile(reg):
+                self._shadow[self._page << 8 | reg] = data[i]
+
+    def _cached(self, register):
+        if not self._cache or self._page is None or _volatile(register):
+            return None
+        return self._shadow.get(self._page << 8 | register)
+
     def _flag(self, register=0x00, bit=0, value=None):
-        data = self._register(register)
+        data = self._cached(register)
+        if data is None:
+            data = self._register(register)
         mask = 1 << bit
         if value is None:
             return bool(data & mask)
@@ -159,8 +216,24 @@ class VL53L0X:
         self._register(register, data)
 
     def _config(self, *config):
+        if not self._cache:
+            for register, value in config:
+                self._register(register, value)
+            return
+        # Coalesce runs of consecutive addresses into one burst write; the
+        # page select register always goes out on its own.
+        start = None
+        run = None
         for register, value in config:
-            self._register(register, value)
+            if run is not None and register == start + len(run) and register != _PAGE_SELECT:
+                run.append(value)
+                continue
+            if run is not None:
+                self._write(start, run)
+            start = register
+            run = bytearray((value,))
+        if run is not None:
+            self._write(start, run)
 
     def init(self, power2v8=True):
         self._flag(_EXTSUP_HV, 0, power2v8)
@@ -311,10 +384,9 @@ class VL53L0X:
         self._flag(_GPIO_MUX_ACTIVE_HIGH, 4, False)
         self._register(_INTERRUPT_CLEAR, 0x01)
 
-        # XXX Need to implement this.
-        # budget = self._timing_budget()
-        # self._register(_SYSTEM_SEQUENCE, 0xe8)
-        # self._timing_budget(budget)
+        budget = self.get_measurement_timing_budget()
+        self._register(_SYSTEM_SEQUENCE, 0xe8)
+        self.set_measurement_timing_budget(budget)
 
         self._register(_SYSTEM_SEQUENCE, 0x01)
         self._calibrate(0x40)
@@ -392,7 +464,9 @@ class VL53L0X:
             oscilator = self._register(_OSC_CALIBRATE, struct='>H')
             if oscilator:
                 period *= oscilator
-            self._register(_MEASURE_PERIOD, period, struct='>H')
+            # SYSTEM_INTERMEASUREMENT_PERIOD is 32 bits wide: period * oscillator
+            # overflows 16 bits for anything longer than a few dozen ms.
+            self._register(_MEASURE_PERIOD, period, struct='>I')
             self._register(_SYSRANGE_START, 0x04)
         else:
             self._register(_SYSRANGE_START, 0x02)
@@ -409,7 +483,69 @@ class VL53L0X:
         )
         self._started = False
 
+    def start_continuous(self, period=0, pin=None, callback=None, buffer_size=8):
+        # Continuous ranging: GPIO1 goes low when a new sample is ready and the
+        # IRQ handler moves it into a ring buffer and calls callback(value),
+        # e.g. to wake a task. Without a pin, fall back to polling through
+        # poll() or read().
+        self._ring = array('H', [0] * buffer_size)
+        self._ring_head = 0
+        self._ring_count = 0
+        self._callback = callback
+        self._register(_INTERRUPT_GPIO, 0x04)
+        self._flag(_GPIO_MUX_ACTIVE_HIGH, 4, False)
+        self._register(_INTERRUPT_CLEAR, 0x01)
+        self._pin = pin
+        if pin is not None:
+            # Soft IRQ (hard=False) so the handler may use the I2C bus.
+            pin.irq(handler=self._data_ready, trigger=Pin.IRQ_FALLING)
+        self.start(period)
+
+    def stop_continuous(self):
+        if self._pin is not None:
+            self._pin.irq(handler=None)
+            self._pin = None
+        # stop() writes SYSRANGE_START=0x01, which starts a single-shot range
+        # when nothing is running and leaves a stale result behind.
+        if self._started:
+            self.stop()
+
+    def _read_result(self):
+        value = self._register(_RESULT_RANGE_STATUS + 10, struct='>H')
+        self._register(_INTERRUPT_CLEAR, 0x01)
+        return value
+
+    def _push(self, value):
+        self._ring[self._ring_head] = value
+        self._ring_head = (self._ring_head + 1) % len(self._ring)
+        if self._ring_count < len(self._ring):
+            self._ring_count += 1
+        if self._callback is not None:
+            self._callback(value)
+
+    def _data_ready(self, pin):
+        self._push(self._read_result())
+
+    def poll(self):
+        # Non-blocking: one status read, fetch the result only if ready.
+        if self._register(_RESULT_INTERRUPT_STATUS) & 0x07:
+            value = self._read_result()
+            self._push(value)
+            return value
+        return None
+
+    def get(self):
+        # Oldest buffered sample, or None.
+        if not self._ring_count:
+            return None
+        index = (self._ring_head - self._ring_count) % len(self._ring)
+        self._ring_count -= 1
+        return self._ring[index]
+
     def read(self):
+        # Blocking read for single-shot and polled continuous mode. In
+        # interrupt mode let the IRQ wake the caller (callback) and take the
+        # buffered samples with get() instead of waiting here.
         if not self._started:
             self._config(
                 (0x80, 0x01),
@@ -437,10 +573,16 @@ class VL53L0X:
         self._register(_INTERRUPT_CLEAR, 0x01)
         return value
 
+    def set_address(self, address):
+        # Volatile: the sensor returns to 0x29 after XSHUT or power cycling.
+        self._register(I2C_SLAVE_DEVICE_ADDRESS, address & 0x7f)
+        self.address = address
+
     def set_signal_rate_limit(self, limit_Mcps):
         if limit_Mcps < 0 or limit_Mcps > 511.99:
             return False
-        self._register(0x44, limit_Mcps * (1 << 7))
+        # Q9.7 fixed point
+        self._register(FINAL_RANGE_CONFIG_MIN_COUNT_RATE_RTN_LIMIT, int(limit_Mcps * (1 << 7)), struct='>H')
         return True
 
     def decode_Vcsel_period(self, reg_val):
@@ -472,54 +614,42 @@ class VL53L0X:
 
             new_pre_range_timeout_mclks = self.timeout_microseconds_to_Mclks(self.timeouts["pre_range_us"],
                                                                              period_pclks)
-            self._register(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI, self.encode_timeout(new_pre_range_timeout_mclks))
+            self._register(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI, self.encode_timeout(new_pre_range_timeout_mclks),
+                           struct='>H')
 
             new_msrc_timeout_mclks = self.timeout_microseconds_to_Mclks(self.timeouts["msrc_dss_tcc_us"],
                                                                         period_pclks)
             self._register(MSRC_CONFIG_TIMEOUT_MACROP, 255 if new_msrc_timeout_mclks > 256 else (new_msrc_timeout_mclks - 1))
         elif type == self.vcsel_period_type[1]:
+            # (valid phase high, vcsel width, phasecal timeout, phasecal limit)
             if period_pclks == 8:
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_HIGH, 0x10)
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_LOW, 0x08)
-                self._register(GLOBAL_CONFIG_VCSEL_WIDTH, 0x02)
-                self._(ALGO_PHASECAL_CONFIG_TIMEOUT, 0x0C)
-                self._register(0xFF, 0x01)
-                self._register(ALGO_PHASECAL_LIM, 0x30)
-                self._register(0xFF, 0x00)
+                phase_high, width, phasecal_timeout, phasecal_lim = 0x10, 0x02, 0x0C, 0x30
             elif period_pclks == 10:
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_HIGH, 0x28)
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_LOW, 0x08)
-                self._register(GLOBAL_CONFIG_VCSEL_WIDTH, 0x03)
-                self._register(ALGO_PHASECAL_CONFIG_TIMEOUT, 0x09)
-                self._register(0xFF, 0x01)
-                self._register(ALGO_PHASECAL_LIM, 0x20)
-                self._register(0xFF, 0x00)
+                phase_high, width, phasecal_timeout, phasecal_lim = 0x28, 0x03, 0x09, 0x20
             elif period_pclks == 12:
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_HIGH, 0x38)
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_LOW, 0x08)
-                self._register(GLOBAL_CONFIG_VCSEL_WIDTH, 0x03)
-                self._register(ALGO_PHASECAL_CONFIG_TIMEOUT, 0x08)
-                self._register(0xFF, 0x01)
-                self._register(ALGO_PHASECAL_LIM, 0x20)
-                self._register(0xFF, 0x00)
+                phase_high, width, phasecal_timeout, phasecal_lim = 0x38, 0x03, 0x08, 0x20
             elif period_pclks == 14:
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_HIGH, 0x48)
-                self._register(FINAL_RANGE_CONFIG_VALID_PHASE_LOW, 0x08)
-                self._register(GLOBAL_CONFIG_VCSEL_WIDTH, 0x03)
-                self._register(ALGO_PHASECAL_CONFIG_TIMEOUT, 0x07)
-                self._register(0xFF, 0x01)
-                self._register(ALGO_PHASECAL_LIM, 0x20)
-                self._register(0xFF, 0x00)
+                phase_high, width, phasecal_timeout, phasecal_lim = 0x48, 0x03, 0x07, 0x20
             else:
                 return False
+            self._config(
+                (FINAL_RANGE_CONFIG_VALID_PHASE_HIGH, phase_high),
+                (FINAL_RANGE_CONFIG_VALID_PHASE_LOW, 0x08),
+                (GLOBAL_CONFIG_VCSEL_WIDTH, width),
+                (ALGO_PHASECAL_CONFIG_TIMEOUT, phasecal_timeout),
+                (0xFF, 0x01),
+                (ALGO_PHASECAL_LIM, phasecal_lim),
+                (0xFF, 0x00),
+            )
 
             self._register(FINAL_RANGE_CONFIG_VCSEL_PERIOD, vcsel_period_reg)
 
             new_final_range_timeout_mclks = self.timeout_microseconds_to_Mclks(self.timeouts["final_range_us"], period_pclks)
 
             if self.enables["pre_range"]:
-                new_final_range_timeout_mclks += 1
-            self._register(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI, self.encode_timeout(new_final_range_timeout_mclks))
+                new_final_range_timeout_mclks += self.timeouts["pre_range_mclks"]
+            self._register(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI, self.encode_timeout(new_final_range_timeout_mclks),
+                           struct='>H')
         else:
             return False
         self.set_measurement_timing_budget(self.measurement_timing_budget_us)
@@ -541,9 +671,9 @@ class VL53L0X:
 
     def get_vcsel_pulse_period(self, type):
         if type == self.vcsel_period_type[0]:
-            return self.decode_Vcsel_period(0x50)
+            return self.decode_Vcsel_period(self._register(PRE_RANGE_CONFIG_VCSEL_PERIOD))
         elif type == self.vcsel_period_type[1]:
-            return self.decode_Vcsel_period(0x70)
+            return self.decode_Vcsel_period(self._register(FINAL_RANGE_CONFIG_VCSEL_PERIOD))
         else:
             return 255
 
@@ -553,12 +683,14 @@ class VL53L0X:
         self.timeouts["msrc_dss_tcc_us"] = self.timeout_Mclks_to_microseconds(self.timeouts["msrc_dss_tcc_mclks"],
                                                                               self.timeouts[
                                                                                   "pre_range_vcsel_period_pclks"])
-        self.timeouts["pre_range_mclks"] = self.decode_timeout(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI)
+        self.timeouts["pre_range_mclks"] = self.decode_timeout(
+            self._register(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI, struct='>H'))
         self.timeouts["pre_range_us"] = self.timeout_Mclks_to_microseconds(self.timeouts["pre_range_mclks"],
                                                                            self.timeouts[
                                                                                "pre_range_vcsel_period_pclks"])
         self.timeouts["final_range_vcsel_period_pclks"] = self.get_vcsel_pulse_period(self.vcsel_period_type[1])
-        self.timeouts["final_range_mclks"] = self.decode_timeout(self._register(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI))
+        self.timeouts["final_range_mclks"] = self.decode_timeout(
+            self._register(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI, struct='>H'))
 
         if self.enables["pre_range"]:
             self.timeouts["final_range_mclks"] -= self.timeouts["pre_range_mclks"]
@@ -568,14 +700,14 @@ class VL53L0X:
 
     def timeout_Mclks_to_microseconds(self, timeout_period_mclks, vcsel_period_pclks):
         macro_period_ns = self.calc_macro_period(vcsel_period_pclks)
-        return ((timeout_period_mclks * macro_period_ns) + (macro_period_ns / 2)) / 1000
+        return ((timeout_period_mclks * macro_period_ns) + 500) // 1000
 
     def timeout_microseconds_to_Mclks(self, timeout_period_us, vcsel_period_pclks):
         macro_period_ns = self.calc_macro_period(vcsel_period_pclks)
-        return (((timeout_period_us * 1000) + (macro_period_ns / 2)) / macro_period_ns)
+        return ((timeout_period_us * 1000) + (macro_period_ns // 2)) // macro_period_ns
 
     def calc_macro_period(self, vcsel_period_pclks):
-        return (((2304 * (vcsel_period_pclks) * 1655) + 500) / 1000)
+        return ((2304 * vcsel_period_pclks * 1655) + 500) // 1000
 
     def decode_timeout(self, reg_val):
         return ((reg_val & 0x00FF) << ((reg_val & 0xFF00) >> 8)) + 1
@@ -591,38 +723,52 @@ class VL53L0X:
             while (ls_byte & 0xFFFFFF00) > 0:
                 ls_byte >>= 1
                 ms_byte += 1
-            return (ms_byte << 8) or (ls_byte & 0xFF)
+            return (ms_byte << 8) | (ls_byte & 0xFF)
         else:
             return 0
 
-    def set_measurement_timing_budget(self, budget_us):
-        start_overhead = 1320
-        end_overhead = 960
-        msrc_overhead = 660
-        tcc_overhead = 590
-        dss_overhead = 690
-        pre_range_overhead = 660
-        final_range_overhead = 550
+    # Per-step overheads from the ST API, in microseconds.
+    _START_OVERHEAD = 1910
+    _END_OVERHEAD = 960
+    _MSRC_OVERHEAD = 660
+    _TCC_OVERHEAD = 590
+    _DSS_OVERHEAD = 690
+    _PRE_RANGE_OVERHEAD = 660
+    _FINAL_RANGE_OVERHEAD = 550
+    MIN_TIMING_BUDGET = 20000
+
+    def _used_budget_us(self):
+        # Time taken by every enabled step except the final range timeout.
+        used_budget_us = self._START_OVERHEAD + self._END_OVERHEAD
+        if self.enables["tcc"]:
+            used_budget_us += self.timeouts["msrc_dss_tcc_us"] + self._TCC_OVERHEAD
+        if self.enables["dss"]:
+            used_budget_us += 2 * (self.timeouts["msrc_dss_tcc_us"] + self._DSS_OVERHEAD)
+        elif self.enables["msrc"]:
+            used_budget_us += self.timeouts["msrc_dss_tcc_us"] + self._MSRC_OVERHEAD
+        if self.enables["pre_range"]:
+            used_budget_us += self.timeouts["pre_range_us"] + self._PRE_RANGE_OVERHEAD
+        return used_budget_us
 
-        min_timing_budget = 20000
+    def get_measurement_timing_budget(self):
+        self.get_sequence_step_enables()
+        self.get_sequence_step_timeouts()
+        budget_us = self._used_budget_us()
+        if self.enables["final_range"]:
+            budget_us += self.timeouts["final_range_us"] + self._FINAL_RANGE_OVERHEAD
+        self.measurement_timing_budget_us = budget_us
+        return budget_us
 
-        if budget_us < min_timing_budget:
+    def set_measurement_timing_budget(self, budget_us):
+        if budget_us < self.MIN_TIMING_BUDGET:
             return False
-        used_budget_us = start_overhead + end_overhead
 
         self.get_sequence_step_enables()
         self.get_sequence_step_timeouts()
+        used_budget_us = self._used_budget_us()
 
-        if self.enables["tcc"]:
-            used_budget_us += self.timeouts["msrc_dss_tcc_us"] + tcc_overhead
-        if self.enables["dss"]:
-            used_budget_us += 2* self.timeouts["msrc_dss_tcc_us"] + dss_overhead
-        if self.enables["msrc"]:
-            used_budget_us += self.timeouts["msrc_dss_tcc_us"] + msrc_overhead
-        if self.enables["pre_range"]:
-            used_budget_us += self.timeouts["pre_range_us"] + pre_range_overhead
         if self.enables["final_range"]:
-            used_budget_us += final_range_overhead
+            used_budget_us += self._FINAL_RANGE_OVERHEAD
 
             if used_budget_us > budget_us:
                 return False
@@ -631,18 +777,25 @@ class VL53L0X:
 
             if self.enables["pre_range"]:
                 final_range_timeout_mclks += self.timeouts["pre_range_mclks"]
-            self._register(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI, self.encode_timeout(final_range_timeout_mclks))
+            self._register(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI, self.encode_timeout(final_range_timeout_mclks),
+                           struct='>H')
             self.measurement_timing_budget_us = budget_us
         return True
 
+    def set_profile(self, name):
+        # Trade sample latency against precision and range, see PROFILES.
+        budget_us, rate_limit, pre_range_pclks, final_range_pclks = PROFILES[name]
+        if not (self.set_signal_rate_limit(rate_limit)
+                and self.set_Vcsel_pulse_period(self.vcsel_period_type[0], pre_range_pclks)
+                and self.set_Vcsel_pulse_period(self.vcsel_period_type[1], final_range_pclks)
+                and self.set_measurement_timing_budget(budget_us)):
+            return False
+        self.profile = name
+        return True
+
     def perform_single_ref_calibration(self, vhv_init_byte):
-        chrono = Timer.Chrono()
-        self._register(SYSRANGE_START, 0x01|vhv_init_byte)
-        chrono.start()
-        while self._register((RESULT_INTERRUPT_STATUS & 0x07) == 0):
-            time_elapsed = chrono.read_ms()
-            if time_elapsed > _IO_TIMEOUT:
-                return False
-        self._register(SYSTEM_INTERRUPT_CLEAR, 0x01)
-        self._register(SYSRANGE_START, 0x00)
-        return True
\ No newline at end of file
+        try:
+            self._calibrate(vhv_init_byte)
+        except TimeoutError:
+            return False
+        return True